@@ -0,0 +1,49 @@
+from cache import Cache
+from mainMem import Memory
+import random, time
+
+# =========================================================
+# Benchmark: cost of a cache hit as associativity grows
+# With the per-set tag index, a lookup is one dict probe, so the
+# time per access should stay flat from direct-mapped all the way
+# to fully associative.
+# =========================================================
+CACHE_SIZE = 1 << 16    # 64 KiB
+BLOCK_SIZE = 64
+ACCESSES = 200_000
+
+
+def time_hits(associativity, seed=0):
+    num_lines = CACHE_SIZE // BLOCK_SIZE
+    memory = Memory(CACHE_SIZE)
+    cache = Cache(CACHE_SIZE, BLOCK_SIZE, associativity, "LRU", "WB")
+
+    # Warm up: memory is exactly cache-sized, so after touching every
+    # block once all later accesses are hits
+    for block in range(num_lines):
+        cache.read(block * BLOCK_SIZE, memory)
+
+    rng = random.Random(seed)
+    addrs = [rng.randrange(CACHE_SIZE) for _ in range(ACCESSES)]
+
+    start = time.perf_counter()
+    for addr in addrs:
+        cache.read(addr, memory)
+    elapsed = time.perf_counter() - start
+
+    return elapsed / ACCESSES * 1e9     # nanoseconds per access
+
+
+def main():
+    num_lines = CACHE_SIZE // BLOCK_SIZE
+    print(f"Cache {CACHE_SIZE} B, block {BLOCK_SIZE} B, {num_lines} lines, {ACCESSES} hits per run")
+    print(f"{'ways':>6}  {'ns/access':>10}")
+
+    associativity = 1
+    while associativity <= num_lines:
+        print(f"{associativity:>6}  {time_hits(associativity):>10.1f}")
+        associativity *= 2
+
+
+if __name__ == "__main__":
+    main()
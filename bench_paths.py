@@ -0,0 +1,75 @@
+from cache import Cache
+from mainMem import Memory
+import random, time
+
+# =========================================================
+# Microbenchmark: generic vs specialized access paths
+# Replays the same random read/write trace through every
+# replacement x write policy combination the simulator supports,
+# once with the generic Cache.read/write (specialize=False) and once
+# with the routines bound at construction (specialize=True).
+# =========================================================
+MEM_SIZE = 1 << 16
+CACHE_SIZE = 1 << 12
+BLOCK_SIZE = 16
+ASSOCIATIVITY = 4
+ACCESSES = 200_000
+REPEATS = 3             # Best of N runs, to damp timer noise
+
+REPLACEMENT_POLICIES = ("RAND", "LRU", "FIFO", "LFU")
+WRITE_POLICIES = ("WT", "WB", "WA")
+
+
+def make_trace(seed=0):
+    # Mostly a hot region (hits) with some cold traffic (misses)
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(ACCESSES):
+        addr = rng.randrange(CACHE_SIZE) if rng.random() < 0.8 else rng.randrange(MEM_SIZE)
+        if rng.random() < 0.3:
+            trace.append(("write", addr, rng.randrange(256)))
+        else:
+            trace.append(("read", addr))
+    return trace
+
+
+def accesses_per_second(trace, replacement, write, specialize):
+    best = 0
+    for _ in range(REPEATS):
+        rate, stats = run_once(trace, replacement, write, specialize)
+        best = max(best, rate)
+    return best, stats
+
+
+def run_once(trace, replacement, write, specialize):
+    memory = Memory(MEM_SIZE)
+    cache = Cache(CACHE_SIZE, BLOCK_SIZE, ASSOCIATIVITY, replacement, write,
+                  seed=0, specialize=specialize)
+    read, write_op = cache.read, cache.write
+
+    start = time.perf_counter()
+    for step in trace:
+        if step[0] == "read":
+            read(step[1], memory)
+        else:
+            write_op(step[1], step[2], memory)
+    elapsed = time.perf_counter() - start
+    return len(trace) / elapsed, (cache.hits, cache.misses)
+
+
+def main():
+    trace = make_trace()
+    print(f"{ACCESSES} accesses, {CACHE_SIZE} B cache, {BLOCK_SIZE} B blocks, {ASSOCIATIVITY}-way")
+    print(f"{'policy':>10}  {'generic/s':>11}  {'specialized/s':>13}  {'speedup':>7}")
+
+    for replacement in REPLACEMENT_POLICIES:
+        for write in WRITE_POLICIES:
+            generic, generic_stats = accesses_per_second(trace, replacement, write, False)
+            special, special_stats = accesses_per_second(trace, replacement, write, True)
+            assert generic_stats == special_stats, "specialized path changed the results"
+            print(f"{replacement + '/' + write:>10}  {generic:>11,.0f}  {special:>13,.0f}  "
+                  f"{special / generic:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+from cache import Cache, to_columns
+from mainMem import Memory
+from workloads import make_workload
+from util import get_associativity
+import argparse, json, platform, sys, time, tracemalloc
+
+# =========================================================
+# Benchmark suite
+# Runs every synthetic workload through Cache for every mapping x
+# replacement x write policy and reports, per combination:
+#   - simulated hits / misses / hit ratio
+#   - simulator throughput (accesses per second, best of N runs)
+#   - peak Python heap during the run (tracemalloc, separate run so
+#     tracing does not slow the timed one)
+# --save writes the results as a JSON baseline; --baseline compares a
+# run against one and exits non-zero on a throughput regression or a
+# changed hit count.
+# =========================================================
+MEM_SIZE = 1 << 16
+CACHE_SIZE = 1 << 12
+BLOCK_SIZE = 16
+
+MAPPINGS = ("direct", "set:4", "full")
+REPLACEMENT_POLICIES = ("RAND", "LRU", "FIFO", "LFU")
+WRITE_POLICIES = ("WT", "WB", "WA")
+
+# (label, workload, write ratio, extra parameters)
+SUITE = [
+    ("sequential", "sequential", 0.0, {}),
+    ("strided", "strided", 0.0, {"stride": 64}),
+    ("random", "random", 0.0, {}),
+    ("zipf", "zipf", 0.0, {"alpha": 1.0}),
+    ("loop", "loop", 0.0, {"working_set": 2 * CACHE_SIZE, "stride": BLOCK_SIZE}),
+    ("zipf-rw", "zipf", 0.3, {"alpha": 1.0}),
+    ("random-rw", "random", 0.5, {}),
+]
+
+
+def run_once(batch, mapping, replacement, write):
+    ops, addrs, values = batch
+    memory = Memory(MEM_SIZE)
+    cache = Cache(CACHE_SIZE, BLOCK_SIZE,
+                  associativity=get_associativity(mapping, CACHE_SIZE // BLOCK_SIZE),
+                  replacement_policy=replacement, write_policy=write, seed=0)
+    cache.access_many(ops, addrs, memory, values)
+    return cache
+
+
+def measure(batch, mapping, replacement, write, repeats):
+    best = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        cache = run_once(batch, mapping, replacement, write)
+        best = max(best, len(batch[1]) / (time.perf_counter() - start))
+
+    tracemalloc.start()
+    run_once(batch, mapping, replacement, write)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total = cache.hits + cache.misses
+    return {
+        "hits": cache.hits,
+        "misses": cache.misses,
+        "hit_ratio": round(cache.hits / total, 6) if total else 0,
+        "accesses_per_second": round(best),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_suite(accesses, repeats=3, seed=0):
+    results = []
+    for label, name, write_ratio, params in SUITE:
+        batch = to_columns(list(make_workload(name, accesses, MEM_SIZE, write_ratio, seed, **params)))
+        for mapping in MAPPINGS:
+            for replacement in REPLACEMENT_POLICIES:
+                for write in WRITE_POLICIES:
+                    result = {"workload": label, "mapping": mapping,
+                              "replacement": replacement, "write": write}
+                    result.update(measure(batch, mapping, replacement, write, repeats))
+                    results.append(result)
+                    print(f"{label:>10} {mapping:>6} {replacement:>4} {write:>2}  "
+                          f"ratio={result['hit_ratio']:.4f}  "
+                          f"{result['accesses_per_second']:>10,}/s  {result['peak_kib']:>8.1f} KiB")
+    return results
+
+
+def key(result):
+    return (result["workload"], result["mapping"], result["replacement"], result["write"])
+
+
+def compare(results, baseline, tolerance):
+    # Returns a list of problems: slower than baseline by more than
+    # `tolerance`, or different simulated hits (a behavior change)
+    old = {key(r): r for r in baseline["results"]}
+    problems = []
+    for r in results:
+        b = old.get(key(r))
+        if b is None:
+            continue
+        name = "/".join(key(r))
+        if r["hits"] != b["hits"] or r["misses"] != b["misses"]:
+            problems.append(f"{name}: hits/misses {r['hits']}/{r['misses']}, "
+                            f"baseline {b['hits']}/{b['misses']}")
+        if r["accesses_per_second"] < b["accesses_per_second"] * (1 - tolerance):
+            problems.append(f"{name}: {r['accesses_per_second']:,}/s, "
+                            f"baseline {b['accesses_per_second']:,}/s")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_suite.py",
+                                     description="Cache simulator benchmark suite.")
+    parser.add_argument("--accesses", type=int, default=50_000, help="accesses per workload")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per combination (best kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--baseline", help="compare against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed throughput drop against the baseline (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.accesses, args.repeats, args.seed)
+    report = {
+        "accesses": args.accesses,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["accesses"] != args.accesses or baseline["seed"] != args.seed:
+            print("Baseline was recorded with different --accesses/--seed.")
+            sys.exit(2)
+        problems = compare(results, baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from array import array
+
 class CacheLine:
     def __init__(self, block_size):
         self.valid = False
@@ -6,15 +8,171 @@ class CacheLine:
         self.dirty = False
         self.last_used = 0
         self.use_count = 0
+        # Sector caches only (see sector.py): bit i = sector i valid / dirty
+        self.sector_valid = 0
+        self.sector_dirty = 0
 
     def load_block(self, tag, block_data):
         self.valid = True
         self.tag = tag
-        self.data = block_data[:]
+        self.data = list(block_data)    # Copy: memory may hand out a view
         self.dirty = False
         self.use_count = 0
 
     def invalidate(self):
         self.valid = False
         self.tag = None
-        self.dirty = False
\ No newline at end of file
+        self.dirty = False
+
+
+# =========================================================
+# Line storage backends
+# Cache addresses lines by number (set_index * associativity + way)
+# and goes through one of these two stores, which share the same
+# methods:
+#   LineStore        - one CacheLine object per line (default)
+#   CompactLineStore - typed arrays for metadata, one bytearray slab
+#                      for all block data; for very large caches
+# Lines hold bytes (0-255). Cache masks every stored value to its low
+# 8 bits before it reaches a store, so both backends behave the same.
+# =========================================================
+
+class LineStore:
+    def __init__(self, num_lines, block_size):
+        self.block_size = block_size
+        self.lines = [CacheLine(block_size) for _ in range(num_lines)]
+
+    def is_valid(self, line_num):
+        return self.lines[line_num].valid
+
+    def get_tag(self, line_num):
+        return self.lines[line_num].tag
+
+    def is_dirty(self, line_num):
+        return self.lines[line_num].dirty
+
+    def mark_dirty(self, line_num):
+        self.lines[line_num].dirty = True
+
+    def mark_clean(self, line_num):
+        self.lines[line_num].dirty = False
+
+    def read_byte(self, line_num, offset):
+        return self.lines[line_num].data[offset]
+
+    def write_byte(self, line_num, offset, value):
+        self.lines[line_num].data[offset] = value
+
+    def block_data(self, line_num):
+        return self.lines[line_num].data
+
+    def copy_bytes(self, line_num, offset, size):
+        return self.lines[line_num].data[offset:offset + size]
+
+    def write_bytes(self, line_num, offset, data):
+        self.lines[line_num].data[offset:offset + len(data)] = data
+
+    def get_sectors(self, line_num):
+        line = self.lines[line_num]
+        return line.sector_valid, line.sector_dirty
+
+    def set_sectors(self, line_num, valid, dirty):
+        line = self.lines[line_num]
+        line.sector_valid = valid
+        line.sector_dirty = dirty
+
+    def touch(self, line_num, now):
+        line = self.lines[line_num]
+        line.last_used = now            # Update last-used time
+        line.use_count += 1             # Increment usage count
+
+    def load_block(self, line_num, tag, block_data, now):
+        line = self.lines[line_num]
+        line.load_block(tag, block_data)
+        line.last_used = now
+
+    def invalidate(self, line_num):
+        self.lines[line_num].invalidate()
+
+
+class CompactLineStore:
+    def __init__(self, num_lines, block_size):
+        self.block_size = block_size
+
+        # Per-line metadata in contiguous typed arrays
+        self.valid = bytearray(num_lines)
+        self.dirty = bytearray(num_lines)
+        self.tag = array("Q", [0]) * num_lines      # Unsigned: 64-bit tags; stale while invalid
+        self.last_used = array("Q", [0]) * num_lines
+        self.use_count = array("I", [0]) * num_lines
+        self.sector_valid = array("Q", [0]) * num_lines     # Sector caches only
+        self.sector_dirty = array("Q", [0]) * num_lines
+
+        # Block data for every line in one preallocated slab:
+        # line n occupies data[n * block_size:(n + 1) * block_size]
+        self.data = bytearray(num_lines * block_size)
+        self.view = memoryview(self.data)
+
+    def is_valid(self, line_num):
+        return self.valid[line_num] == 1
+
+    def get_tag(self, line_num):
+        return self.tag[line_num]
+
+    def is_dirty(self, line_num):
+        return self.dirty[line_num] == 1
+
+    def mark_dirty(self, line_num):
+        self.dirty[line_num] = 1
+
+    def mark_clean(self, line_num):
+        self.dirty[line_num] = 0
+
+    def read_byte(self, line_num, offset):
+        return self.data[line_num * self.block_size + offset]
+
+    def write_byte(self, line_num, offset, value):
+        self.data[line_num * self.block_size + offset] = value
+
+    def block_data(self, line_num):
+        # Zero-copy view of the line's bytes, used for writebacks
+        start = line_num * self.block_size
+        return self.view[start:start + self.block_size]
+
+    def copy_bytes(self, line_num, offset, size):
+        start = line_num * self.block_size + offset
+        return self.data[start:start + size]
+
+    def write_bytes(self, line_num, offset, data):
+        start = line_num * self.block_size + offset
+        self.data[start:start + len(data)] = data
+
+    def get_sectors(self, line_num):
+        return self.sector_valid[line_num], self.sector_dirty[line_num]
+
+    def set_sectors(self, line_num, valid, dirty):
+        self.sector_valid[line_num] = valid
+        self.sector_dirty[line_num] = dirty
+
+    def touch(self, line_num, now):
+        self.last_used[line_num] = now
+        self.use_count[line_num] += 1
+
+    def load_block(self, line_num, tag, block_data, now):
+        start = line_num * self.block_size
+        self.data[start:start + self.block_size] = block_data    # One slice copy per fill
+        self.valid[line_num] = 1
+        self.dirty[line_num] = 0
+        self.tag[line_num] = tag
+        self.last_used[line_num] = now
+        self.use_count[line_num] = 0
+
+    def invalidate(self, line_num):
+        self.valid[line_num] = 0
+        self.dirty[line_num] = 0
+
+
+STORAGE_BACKENDS = {
+    "objects": LineStore,
+    "compact": CompactLineStore,
+}
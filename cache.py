@@ -1,27 +1,75 @@
-from block import CacheLine
-import random, time
+from block import STORAGE_BACKENDS
+from replacement import make_policy
+from fastpath import bind_access_paths
+from array import array
+
+# Outcome codes returned by Cache.access_many (bit flags)
+OUTCOME_MISS = 0
+OUTCOME_HIT = 1
+OUTCOME_WRITEBACK = 2       # The access evicted a dirty block
+
+
+def is_power_of_two(n):
+    return n > 0 and n & (n - 1) == 0
+
+
+def to_columns(sequence):
+    # ("read", addr) / ("write", addr, value) tuples -> (ops, addrs, values)
+    # lists, as Cache.access_many takes them
+    ops = [step[0] == "write" for step in sequence]
+    addrs = [step[1] for step in sequence]
+    values = [step[2] if len(step) > 2 else 0 for step in sequence]
+    return ops, addrs, values
 
 class Cache:
-    def __init__(self, cache_size, block_size, associativity, replacement_policy, write_policy):
+    def __init__(self, cache_size, block_size, associativity, replacement_policy, write_policy, seed=0,
+                 storage="objects", specialize=True, future=None):
         self.cache_size = cache_size            # Total cache size (in bytes)
         self.block_size = block_size            # Size of one block (in bytes)
         self.associativity = associativity      # Number of lines per set (e.g., 1 for direct-mapped, N for N-way)
-        self.replacement_policy = replacement_policy  # Policy: RAND, LRU, FIFO, or LFU
+        self.replacement_policy = replacement_policy  # Policy: RAND, LRU, FIFO, LFU or OPT
         self.write_policy = write_policy        # Policy: WT (write-through) or WB (write-back) or WA (Write Around)
 
 
         self.num_lines = cache_size // block_size       # Total number of cache lines
         self.num_sets = self.num_lines // associativity # Total number of sets in the cache
 
-        # Create a list of sets, each containing multiple CacheLine objects
-        self.sets = [
-            [CacheLine(block_size) for _ in range(associativity)]
-            for _ in range(self.num_sets)
-        ]
+        # Power-of-two geometry: addresses can be decoded with shifts and masks
+        self.pow2 = is_power_of_two(block_size) and is_power_of_two(self.num_sets)
+        self.offset_bits = block_size.bit_length() - 1
+        self.set_bits = self.num_sets.bit_length() - 1
+
+        # Line storage: "objects" (one CacheLine per line) or "compact"
+        # (typed arrays + one data slab). Line number = set_index * associativity + way
+        if storage not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {storage}")
+        self.storage = storage
+        self.store = STORAGE_BACKENDS[storage](self.num_lines, block_size)
+
+        # Per-set tag -> line number index, so hit detection never scans a set
+        self.tag_index = [{} for _ in range(self.num_sets)]
+
+        # Victim selection and recency/frequency bookkeeping (see replacement.py).
+        # OPT also needs `future`, the trace's next-use index.
+        self.policy = make_policy(replacement_policy, self.num_sets, associativity, seed, future)
+
+        # Logical clock: counts accesses, used instead of wall-clock time stamps
+        self.clock = 0
 
         # Initialize hit/miss counters
         self.hits = 0
         self.misses = 0
+        self.writebacks = 0                     # Dirty blocks written back to memory
+
+        # Optional callback on_evict(block_num, block_data, dirty), called when
+        # a valid block is replaced (after any writeback). Used by hierarchy.py.
+        self.on_evict = None
+
+        # Replace the generic read/write below with routines specialized
+        # for this configuration (see fastpath.py)
+        self.specialize = specialize
+        if specialize:
+            bind_access_paths(self)
 
     #  CACHE READ OPERATION
     def read(self, address, memory):
@@ -30,15 +78,20 @@ class Cache:
         tag = block_num // self.num_sets                # Tag identifies which block is stored
         set_index = block_num % self.num_sets           # Which set this block maps to
         offset = address % self.block_size              # Offset inside the block
+        return self.read_decoded(block_num, tag, set_index, offset, memory)
+
+    def read_decoded(self, block_num, tag, set_index, offset, memory):
+        # Read with the address already split into block/tag/set/offset
+        self.clock += 1
 
-        # Search for the block in the target set
-        for line in self.sets[set_index]:
-            if line.valid and line.tag == tag:
-                # Cache hit
-                self.hits += 1
-                line.last_used = time.time()            # Update last-used time (for LRU/FIFO)
-                line.use_count += 1                     # Increment usage count (for LFU)
-                return line.data[offset]                # Return the requested byte
+        # Look the tag up in the set's index
+        line_num = self.tag_index[set_index].get(tag)
+        if line_num is not None:
+            # Cache hit
+            self.hits += 1
+            self.store.touch(line_num, self.clock)      # Update last-used time and usage count
+            self.policy.touch(set_index, line_num, self.clock)
+            return self.store.read_byte(line_num, offset)   # Return the requested byte
 
         # Cache miss
         self.misses += 1
@@ -47,16 +100,15 @@ class Cache:
         block_data = memory.read_block(block_num, self.block_size)
 
         # Choose a line in the set to replace (victim)
-        victim = self.choose_victim(self.sets[set_index])
+        line_num = self.choose_victim(set_index)
 
         # If victim is dirty and write-back policy, write it back to memory
-        if victim.dirty and self.write_policy == "WB":
-            memory.write_block(victim.tag * self.num_sets + set_index, victim.data)
+        if self.store.is_dirty(line_num) and self.write_policy == "WB":
+            self.write_back(set_index, line_num, memory)
 
         # Load new block into victim line
-        victim.load_block(tag, block_data)
-        victim.last_used = time.time()
-        return victim.data[offset]
+        self.fill_line(set_index, line_num, tag, block_data)
+        return self.store.read_byte(line_num, offset)
 
     #  CACHE WRITE OPERATION
     def write(self, address, value, memory):
@@ -65,37 +117,43 @@ class Cache:
         tag = block_num // self.num_sets
         set_index = block_num % self.num_sets
         offset = address % self.block_size
-
-        # Search for block in target set
-        for line in self.sets[set_index]:
-            if line.valid and line.tag == tag:
-                # Cache hit
-                self.hits += 1
-
-                if self.write_policy == "WA":
-                    # Write-around (no-write-allocate) — HIT behavior:
-                    # update the cache line and main memory (write-through on hits),
-                    # keep the line valid so subsequent reads hit.
-                    line.data[offset] = value
-                    memory.write_byte(address, value)
-                    line.last_used = time.time()
-                    line.use_count += 1
-                    return
-
-                # For WT/WB, we keep existing behavior
-                line.data[offset] = value    # Write value to cache line
-
-                if self.write_policy == "WT":
-                    # Write-through: immediately update memory
-                    memory.write_byte(address, value)
-                else:
-                    # Write-back: mark dirty, write later on eviction
-                    line.dirty = True
-
-                line.last_used = time.time()
-                line.use_count += 1
+        self.write_decoded(address, value, block_num, tag, set_index, offset, memory)
+
+    def write_decoded(self, address, value, block_num, tag, set_index, offset, memory):
+        # Write with the address already split into block/tag/set/offset
+        self.clock += 1
+        value &= 0xFF               # Stores hold bytes: keep the low 8 bits, as every backend can
+
+        # Look the tag up in the set's index
+        line_num = self.tag_index[set_index].get(tag)
+        if line_num is not None:
+            # Cache hit
+            self.hits += 1
+
+            if self.write_policy == "WA":
+                # Write-around (no-write-allocate) — HIT behavior:
+                # update the cache line and main memory (write-through on hits),
+                # keep the line valid so subsequent reads hit.
+                self.store.write_byte(line_num, offset, value)
+                memory.write_byte(address, value)
+                self.store.touch(line_num, self.clock)
+                self.policy.touch(set_index, line_num, self.clock)
                 return
 
+            # For WT/WB, we keep existing behavior
+            self.store.write_byte(line_num, offset, value)    # Write value to cache line
+
+            if self.write_policy == "WT":
+                # Write-through: immediately update memory
+                memory.write_byte(address, value)
+            else:
+                # Write-back: mark dirty, write later on eviction
+                self.store.mark_dirty(line_num)
+
+            self.store.touch(line_num, self.clock)
+            self.policy.touch(set_index, line_num, self.clock)
+            return
+
         # Cache miss
         self.misses += 1
 
@@ -112,19 +170,18 @@ class Cache:
             block_data = memory.read_block(block_num, self.block_size)
 
             # Choose a victim to replace
-            victim = self.choose_victim(self.sets[set_index])
+            line_num = self.choose_victim(set_index)
 
             # (Only relevant for WB, but kept consistent)
-            if victim.dirty and self.write_policy == "WB":
-                memory.write_block(victim.tag * self.num_sets + set_index, victim.data)
+            if self.store.is_dirty(line_num) and self.write_policy == "WB":
+                self.write_back(set_index, line_num, memory)
 
             # Load new block into cache
-            victim.load_block(tag, block_data)
+            self.fill_line(set_index, line_num, tag, block_data)
             # Apply the write
-            victim.data[offset] = value
+            self.store.write_byte(line_num, offset, value)
             # Write-through to memory
             memory.write_byte(address, value)
-            victim.last_used = time.time()
             return
 
         else:
@@ -132,36 +189,206 @@ class Cache:
             block_data = memory.read_block(block_num, self.block_size)
 
             # Choose a victim to replace
-            victim = self.choose_victim(self.sets[set_index])
+            line_num = self.choose_victim(set_index)
 
             # If the victim line is dirty, write it back before replacement
-            if victim.dirty:
-                memory.write_block(victim.tag * self.num_sets + set_index, victim.data)
+            if self.store.is_dirty(line_num):
+                self.write_back(set_index, line_num, memory)
 
             # Load the new block, then update with new data
-            victim.load_block(tag, block_data)
-            victim.data[offset] = value
-            victim.dirty = True
-            victim.last_used = time.time()
+            self.fill_line(set_index, line_num, tag, block_data)
+            self.store.write_byte(line_num, offset, value)
+            self.store.mark_dirty(line_num)
+
+
+    #  BATCH ACCESS
+    def access_many(self, ops, addrs, memory, values=None):
+        # Runs a whole batch of accesses in one call.
+        # ops:    "read"/"write" strings, or 0 (read) / 1 (write) codes
+        # addrs:  addresses (any sequence or array of ints)
+        # values: bytes to store, used at write positions (default: all zero)
+        # Returns an array('B') of outcome flags, one per access:
+        # OUTCOME_HIT or OUTCOME_MISS, plus OUTCOME_WRITEBACK if a dirty
+        # block was evicted.
+        n = len(addrs)
+        outcomes = array("B", bytes(n))
+        if n == 0:
+            return outcomes
+        if isinstance(ops[0], str):
+            ops = [op == "write" for op in ops]
+        if values is None:
+            values = bytes(n)
+
+        read_decoded = self.read_decoded
+        write_decoded = self.write_decoded
+        pow2 = self.pow2
+        offset_bits = self.offset_bits
+        offset_mask = self.block_size - 1
+        set_bits = self.set_bits
+        set_mask = self.num_sets - 1
+        block_size = self.block_size
+        num_sets = self.num_sets
+
+        for i in range(n):
+            address = addrs[i]
+
+            # Decode once, with shifts/masks when the geometry allows it
+            if pow2:
+                block_num = address >> offset_bits
+                offset = address & offset_mask
+                set_index = block_num & set_mask
+                tag = block_num >> set_bits
+            else:
+                block_num, offset = divmod(address, block_size)
+                tag, set_index = divmod(block_num, num_sets)
+
+            misses = self.misses
+            writebacks = self.writebacks
+
+            if ops[i]:
+                write_decoded(address, values[i], block_num, tag, set_index, offset, memory)
+            else:
+                read_decoded(block_num, tag, set_index, offset, memory)
+
+            if self.misses == misses:
+                outcomes[i] = OUTCOME_HIT
+            elif self.writebacks != writebacks:
+                outcomes[i] = OUTCOME_WRITEBACK
+
+        return outcomes
+
+    def access_sequence(self, sequence, memory):
+        # access_many for ("read", addr) / ("write", addr, value) tuples
+        ops, addrs, values = to_columns(sequence)
+        return self.access_many(ops, addrs, memory, values)
+
+    #  WRITE A DIRTY LINE BACK TO MEMORY
+    def write_back(self, set_index, line_num, memory):
+        block_num = self.store.get_tag(line_num) * self.num_sets + set_index
+        memory.write_block(block_num, self.store.block_data(line_num))
+        self.writebacks += 1
+
+    #  BLOCK FILL (KEEPS THE TAG INDEX IN SYNC)
+    def fill_line(self, set_index, line_num, tag, block_data):
+        index = self.tag_index[set_index]
+
+        # Drop the evicted block's tag before the line is overwritten
+        if self.store.is_valid(line_num):
+            old_tag = self.store.get_tag(line_num)
+            del index[old_tag]
+            if self.on_evict is not None:
+                self.on_evict(old_tag * self.num_sets + set_index,
+                              self.store.block_data(line_num), self.store.is_dirty(line_num))
+
+        self.store.load_block(line_num, tag, block_data, self.clock)
+        index[tag] = line_num
+        self.policy.insert(set_index, line_num, self.clock)
+
+    #  INVALIDATE A BLOCK
+    def invalidate(self, address, memory=None):
+        # Removes the block holding `address` from the cache.
+        # A dirty block is written back first when memory is given.
+        block_num = address // self.block_size
+        tag = block_num // self.num_sets
+        set_index = block_num % self.num_sets
 
+        line_num = self.tag_index[set_index].pop(tag, None)
+        if line_num is None:
+            return False
 
-    #  BLOCK REPLACEMENT (VICTIM SELECT)
-    def choose_victim(self, cache_set):
-        # Random Replacement: pick any line
-        if self.replacement_policy == "RAND":
-            return random.choice(cache_set)
+        if self.store.is_dirty(line_num) and memory is not None:
+            self.write_back(set_index, line_num, memory)
+        self.store.invalidate(line_num)
+        self.policy.remove(set_index, line_num)
+        return True
 
-        # Least Recently Used (LRU): replace line with oldest last_used timestamp
-        elif self.replacement_policy == "LRU":
-            return min(cache_set, key=lambda l: l.last_used)
+    #  CLEAN A BLOCK
+    def clean(self, address, memory):
+        # Writes the block holding `address` back if it is dirty and
+        # keeps it cached, now clean (e.g. a snooped read of a MESI M line)
+        block_num = address // self.block_size
+        set_index = block_num % self.num_sets
+        line_num = self.tag_index[set_index].get(block_num // self.num_sets)
+        if line_num is None or not self.store.is_dirty(line_num):
+            return False
+        self.write_back(set_index, line_num, memory)
+        self.store.mark_clean(line_num)
+        return True
+
+    #  BLOCK-LEVEL INTERFACE
+    # With these, a Cache can sit behind another Cache the same way
+    # Memory does (see hierarchy.LowerLevel).
+    def contains(self, address):
+        block_num = address // self.block_size
+        return block_num // self.num_sets in self.tag_index[block_num % self.num_sets]
 
-        # First In First Out (FIFO): same as LRU here if initialized by time
-        elif self.replacement_policy == "FIFO":
-            return min(cache_set, key=lambda l: l.last_used)
+    def read_block(self, address, size, memory):
+        # Returns a copy of `size` bytes starting at `address` (which must
+        # not cross a block). Counts as one access; a miss fills the block.
+        self.read(address, memory)
+        block_num = address // self.block_size
+        line_num = self.tag_index[block_num % self.num_sets][block_num // self.num_sets]
+        return self.store.copy_bytes(line_num, address % self.block_size, size)
 
-        # Least Frequently Used (LFU): replace line with smallest use_count
-        elif self.replacement_policy == "LFU":
-            return min(cache_set, key=lambda l: l.use_count)
+    def write_block(self, address, block_data, memory):
+        # Stores a whole (sub-)block coming from the level above, following
+        # this cache's write policy. Counts as one access.
+        block_num = address // self.block_size
+        tag = block_num // self.num_sets
+        set_index = block_num % self.num_sets
+        offset = address % self.block_size
+        size = len(block_data)
+        self.clock += 1
+
+        line_num = self.tag_index[set_index].get(tag)
+        if line_num is not None:
+            self.hits += 1
+            self.store.touch(line_num, self.clock)
+            self.policy.touch(set_index, line_num, self.clock)
+        else:
+            self.misses += 1
+            if self.write_policy == "WA":
+                memory.write_block(address // size, block_data)
+                return
+            line_num = self.allocate(block_num, memory)
 
-        # Default: pick first line if something goes wrong
-        return cache_set[0]
+        self.store.write_bytes(line_num, offset, block_data)
+        if self.write_policy == "WB":
+            self.store.mark_dirty(line_num)
+        else:
+            memory.write_block(address // size, block_data)
+
+    def install_block(self, address, block_data, memory, dirty=False):
+        # Places a whole block in the cache through the normal victim path,
+        # without counting a demand access (victim caches, prefetches).
+        block_num = address // self.block_size
+        line_num = self.allocate(block_num, memory, block_data)
+        if dirty:
+            if self.write_policy == "WB":
+                self.store.mark_dirty(line_num)
+            else:
+                memory.write_block(block_num, block_data)
+        return line_num
+
+    def allocate(self, block_num, memory, block_data=None):
+        # Picks a victim, writes it back if dirty and loads the block
+        # (fetched from memory unless block_data is given)
+        set_index = block_num % self.num_sets
+        if block_data is None:
+            block_data = memory.read_block(block_num, self.block_size)
+        line_num = self.choose_victim(set_index)
+        if self.store.is_dirty(line_num):
+            self.write_back(set_index, line_num, memory)
+        self.fill_line(set_index, line_num, block_num // self.num_sets, block_data)
+        return line_num
+
+    #  BLOCK REPLACEMENT (VICTIM SELECT)
+    def choose_victim(self, set_index):
+        # Returns the line number (index into self.store) to replace.
+        # Empty lines go first; otherwise the policy picks in O(1):
+        #   RAND - seeded random way
+        #   LRU  - head of the set's recency list
+        #   FIFO - oldest line in the set's insertion queue
+        #   LFU  - oldest line in the lowest use-count bucket
+        #   OPT  - line whose block is used furthest in the future
+        return self.policy.victim(set_index)
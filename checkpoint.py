@@ -0,0 +1,288 @@
+from array import array
+import mmap, pickle, struct
+
+from block import CompactLineStore
+from cache import Cache
+from fastpath import bind_access_paths
+from mainMem import Memory, SparseMemory, MappedMemory
+from replacement import NEVER, OPTPolicy, build_next_use, first_uses
+
+# =========================================================
+# Checkpoint / restore
+# Saves a warmed Cache and its Memory to one snapshot file, so a single
+# warm-up can be restored into many measurement runs, or a long replay
+# can pick up where it stopped.
+#
+# File layout:
+#   header  magic b"CCKP", version, metadata offset and length, image
+#           offset (0 for a paged image)
+#   image   the memory contents, in one of two forms:
+#           flat  - one region at a page-aligned offset, byte a at
+#                   image offset + a; all-zero pages are never written,
+#                   so the file is sparse on disk. Only for memories of
+#                   at most FLAT_IMAGE_LIMIT bytes that are not sparse.
+#           paged - (page number, page bytes) records for the non-zero
+#                   pages only; for SparseMemory and larger memories,
+#                   whose address space may be 2^48 or 2^64 bytes
+#   metadata (pickle, after the image): cache configuration,
+#           counters and clock, line state as columns (valid / dirty /
+#           tag / last_used / use_count arrays + one data slab, for
+#           either store), the replacement policy object (recency
+#           lists, LFU buckets, RNG state), the memory kind, the image
+#           form and the list of non-zero pages
+#
+# load_checkpoint(path, mapped=True) maps a flat image copy-on-write
+# instead of reading it: restoring is instant, and runs forked from the
+# same snapshot share its unmodified pages. A paged image is always
+# read into memory.
+#
+# An OPT policy is saved with the next-use index of the accesses run so
+# far, which ranks every line NEVER past the snapshot: resume_opt must
+# give it the index of the whole trace before the run carries on.
+# =========================================================
+
+CHECKPOINT_MAGIC = b"CCKP"
+CHECKPOINT_VERSION = 2
+CHECKPOINT_HEADER = struct.Struct("<4sIQQQ")
+PAGE_RECORD = struct.Struct("<Q")           # Page number, followed by the page's bytes
+PAGE = 4096
+ZERO_PAGE = bytes(PAGE)
+FLAT_IMAGE_LIMIT = 1 << 32                  # Largest memory saved as a flat image
+
+
+class Checkpoint:
+    def __init__(self, cache, memory, position):
+        self.cache = cache
+        self.memory = memory
+        self.position = position        # Trace accesses consumed before the snapshot
+
+
+# ---------------- saving ----------------
+def _line_columns(cache):
+    store = cache.store
+    if isinstance(store, CompactLineStore):
+        return {
+            "valid": bytes(store.valid),
+            "dirty": bytes(store.dirty),
+            "tag": store.tag.tobytes(),
+            "last_used": store.last_used.tobytes(),
+            "use_count": store.use_count.tobytes(),
+            "data": bytes(store.data),
+        }
+
+    lines = store.lines
+    try:
+        data = b"".join(bytes(line.data) for line in lines)
+    except ValueError:
+        raise ValueError("Cache lines hold values outside 0-255; they cannot be checkpointed.")
+    return {
+        "valid": bytes(line.valid for line in lines),
+        "dirty": bytes(line.dirty for line in lines),
+        "tag": array("Q", (0 if line.tag is None else line.tag for line in lines)).tobytes(),
+        "last_used": array("Q", (line.last_used for line in lines)).tobytes(),
+        "use_count": array("I", (line.use_count for line in lines)).tobytes(),
+        "data": data,
+    }
+
+
+def _memory_pages(memory):
+    # Page numbers (PAGE-sized) that may hold non-zero bytes
+    if isinstance(memory, SparseMemory):
+        pages = set()
+        per_page = memory.page_size
+        for page_num in memory.pages:
+            first = page_num * per_page // PAGE
+            pages.update(range(first, first + max(1, per_page // PAGE)))
+        return sorted(p for p in pages if p * PAGE < memory.size)
+    return range((memory.size + PAGE - 1) // PAGE)
+
+
+def _memory_kind(memory):
+    if isinstance(memory, SparseMemory):
+        return "sparse"
+    if isinstance(memory, MappedMemory):
+        return "mmap"
+    return "list"
+
+
+def check_checkpointable(cache):
+    # Raises ValueError for caches whose state save_checkpoint cannot hold
+    if type(cache) is not Cache:
+        raise ValueError(f"{type(cache).__name__} state cannot be checkpointed, only Cache.")
+
+
+def save_checkpoint(path, cache, memory, position=None):
+    # position defaults to the cache's clock, i.e. the number of accesses
+    # replayed so far in a plain run_trace replay
+    check_checkpointable(cache)
+    flat = not isinstance(memory, SparseMemory) and memory.size <= FLAT_IMAGE_LIMIT
+    meta = {
+        "config": {
+            "cache_size": cache.cache_size,
+            "block_size": cache.block_size,
+            "associativity": cache.associativity,
+            "replacement_policy": cache.replacement_policy,
+            "write_policy": cache.write_policy,
+            "storage": cache.storage,
+            "specialize": cache.specialize,
+        },
+        "counters": (cache.hits, cache.misses, cache.writebacks, cache.clock),
+        "lines": _line_columns(cache),
+        "policy": cache.policy,
+        "memory": {"kind": _memory_kind(memory), "size": memory.size,
+                   "page_size": getattr(memory, "page_size", None),
+                   "image": "flat" if flat else "paged"},
+        "position": cache.clock if position is None else position,
+    }
+
+    with open(path, "wb") as f:
+        image_offset = _align(CHECKPOINT_HEADER.size) if flat else 0
+        f.write(bytes(CHECKPOINT_HEADER.size))      # Header slot, filled in last
+        pages = []
+        for page_num in _memory_pages(memory):
+            start = page_num * PAGE
+            length = min(PAGE, memory.size - start)
+            try:
+                if length == PAGE:
+                    chunk = bytes(memory.read_block(page_num, PAGE))
+                else:
+                    chunk = bytes(memory.read_byte(a) for a in range(start, start + length))
+            except ValueError:
+                raise ValueError("Memory holds values outside 0-255; it cannot be checkpointed.")
+            if chunk != ZERO_PAGE[:length]:
+                if flat:
+                    f.seek(image_offset + start)
+                else:
+                    f.write(PAGE_RECORD.pack(page_num))
+                f.write(chunk)
+                pages.append(page_num)
+
+        # Metadata follows the image, once the page list is known
+        meta["memory"]["pages"] = pages
+        body = pickle.dumps(meta, protocol=pickle.HIGHEST_PROTOCOL)
+        meta_offset = image_offset + memory.size if flat else f.tell()
+        f.seek(meta_offset)
+        f.write(body)
+        f.seek(0)
+        f.write(CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, meta_offset,
+                                       len(body), image_offset))
+
+
+def _align(offset):
+    granularity = mmap.ALLOCATIONGRANULARITY
+    return (offset + granularity - 1) // granularity * granularity
+
+
+# ---------------- restoring ----------------
+def _restore_lines(cache, lines):
+    store = cache.store
+    if isinstance(store, CompactLineStore):
+        store.valid[:] = lines["valid"]
+        store.dirty[:] = lines["dirty"]
+        store.tag = array("Q", lines["tag"])
+        store.last_used = array("Q", lines["last_used"])
+        store.use_count = array("I", lines["use_count"])
+        store.data[:] = lines["data"]
+    else:
+        tags = array("Q", lines["tag"])
+        last_used = array("Q", lines["last_used"])
+        use_count = array("I", lines["use_count"])
+        data = lines["data"]
+        block_size = cache.block_size
+        for i, line in enumerate(store.lines):
+            line.valid = bool(lines["valid"][i])
+            line.dirty = bool(lines["dirty"][i])
+            line.tag = tags[i] if line.valid else None
+            line.last_used = last_used[i]
+            line.use_count = use_count[i]
+            line.data = list(data[i * block_size:(i + 1) * block_size])
+
+    # The tag index is derived state: rebuild it from the valid lines
+    assoc = cache.associativity
+    for line_num, tag in enumerate(array("Q", lines["tag"])):
+        if lines["valid"][line_num]:
+            cache.tag_index[line_num // assoc][tag] = line_num
+
+
+def _read_meta(f, path):
+    # Returns (metadata, image offset) of an open checkpoint
+    header = f.read(CHECKPOINT_HEADER.size)
+    if len(header) < CHECKPOINT_HEADER.size:
+        raise ValueError(f"Not a checkpoint: {path}")
+    magic, version, meta_offset, meta_len, image_offset = CHECKPOINT_HEADER.unpack(header)
+    if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+        raise ValueError(f"Not a checkpoint (or unknown version): {path}")
+    f.seek(meta_offset)
+    return pickle.loads(f.read(meta_len)), image_offset
+
+
+def read_checkpoint_config(path):
+    # Cache configuration and memory kind/size of a checkpoint, without
+    # restoring it (used to check a --resume against the command line)
+    with open(path, "rb") as f:
+        meta = _read_meta(f, path)[0]
+    return meta["config"], meta["memory"]
+
+
+def load_checkpoint(path, mapped=False):
+    with open(path, "rb") as f:
+        meta, image_offset = _read_meta(f, path)
+
+        # Cache: build it unspecialized, load the state, then bind the
+        # fast paths so they capture the restored store and policy
+        config = dict(meta["config"])
+        specialize = config.pop("specialize")
+        # OPT's index comes with the pickled policy (see resume_opt)
+        future = array("Q") if config["replacement_policy"] == "OPT" else None
+        cache = Cache(**config, specialize=False, future=future)
+        cache.hits, cache.misses, cache.writebacks, cache.clock = meta["counters"]
+        cache.policy = meta["policy"]
+        _restore_lines(cache, meta["lines"])
+        if specialize:
+            cache.specialize = True
+            bind_access_paths(cache)
+
+        # Memory
+        info = meta["memory"]
+        size = info["size"]
+        flat = info["image"] == "flat"
+        if mapped and flat:
+            memory = MappedMemory(size, path, offset=image_offset, copy_on_write=True)
+        else:
+            if info["kind"] == "sparse":
+                memory = SparseMemory(size, info["page_size"])
+            elif info["kind"] == "mmap":
+                memory = MappedMemory(size)
+            else:
+                memory = Memory(size)
+            if not flat:
+                f.seek(CHECKPOINT_HEADER.size)
+            for page_num in info["pages"]:
+                start = page_num * PAGE
+                if flat:
+                    f.seek(image_offset + start)
+                else:
+                    f.seek(PAGE_RECORD.size, 1)     # Record's page number (= page_num)
+                chunk = f.read(min(PAGE, size - start))
+                if len(chunk) == PAGE:
+                    memory.write_block(page_num, chunk)
+                else:
+                    for i, value in enumerate(chunk):
+                        memory.write_byte(start + i, value)
+
+    return Checkpoint(cache, memory, meta["position"])
+
+
+def resume_opt(cache, addrs, position):
+    # Installs the next-use index of the whole trace (addrs, already
+    # folded into memory) on a restored OPT policy, and re-keys each
+    # cached line by its block's first access at or after position
+    if not isinstance(cache.policy, OPTPolicy):
+        return
+    first = first_uses(addrs, cache.block_size, position)
+    lines = []
+    for set_index, tags in enumerate(cache.tag_index):
+        for tag, line_num in tags.items():
+            block_num = tag * cache.num_sets + set_index
+            lines.append((set_index, line_num, first.get(block_num, NEVER)))
+    cache.policy.reindex(build_next_use(addrs, cache.block_size), lines)
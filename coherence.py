@@ -0,0 +1,192 @@
+import itertools, sys
+
+from cache import Cache
+from mainMem import Memory
+from trace_reader import read_trace
+from util import get_associativity, print_stats
+
+# =========================================================
+# Multi-core mode: private caches kept coherent with MESI
+# Each core has its own write-back Cache in front of ONE shared
+# Memory. A snooping bus keeps every block in one of these states per
+# core (blocks a core does not hold are Invalid):
+#   M (Modified)  - only copy, dirty
+#   E (Exclusive) - only copy, clean
+#   S (Shared)    - clean, other cores may hold it too
+#
+# Read miss  (BusRd):  an M holder flushes to memory; every holder
+#                      drops to S; the reader gets S, or E when alone
+# Write hit  on S (BusUpgr), write miss (BusRdX): every other copy is
+#                      invalidated (an M copy is written back first);
+#                      the writer ends in M. A write hit on E is silent.
+#
+# Besides the usual hits/misses, per core:
+#   coherence misses  - misses on blocks lost to another core's write,
+#                       split into true sharing (the byte read or written
+#                       was written remotely meanwhile) and false sharing
+#   invalidations     - copies this core's writes removed elsewhere
+#   transfers         - misses served by another core's copy
+#                       (cache-to-cache)
+# =========================================================
+
+class CoherentSystem:
+    def __init__(self, num_cores, cache_size, block_size, mapping, replacement,
+                 mem_size, storage="objects"):
+        self.memory = Memory(mem_size)
+        self.block_size = block_size
+        self.states = [{} for _ in range(num_cores)]        # block -> "M" / "E" / "S"
+        # Blocks each core lost to a remote write -> offsets written remotely since
+        self.lost = [{} for _ in range(num_cores)]
+
+        self.caches = []
+        for core in range(num_cores):
+            cache = Cache(
+                cache_size,
+                block_size,
+                associativity=get_associativity(mapping, cache_size // block_size),
+                replacement_policy=replacement,
+                write_policy="WB",              # MESI assumes write-back caches
+                seed=core,
+                storage=storage,
+            )
+            cache.on_evict = self._on_evict(core)
+            self.caches.append(cache)
+
+        self.coherence_misses = [0] * num_cores
+        self.false_sharing = [0] * num_cores
+        self.invalidations = [0] * num_cores
+        self.transfers = [0] * num_cores
+        self.upgrades = [0] * num_cores
+
+    def _on_evict(self, core):
+        # A replaced block leaves the core's state table (any M copy has
+        # already been written back by the cache)
+        states = self.states[core]
+
+        def on_evict(block_num, block_data, dirty):
+            states.pop(block_num, None)
+        return on_evict
+
+    # ---------------- bus transactions ----------------
+    def _miss(self, core, block_num, offset):
+        # Coherence-miss bookkeeping, then snoop the other cores.
+        # Returns the cores holding the block.
+        written = self.lost[core].pop(block_num, None)
+        if written is not None:
+            self.coherence_misses[core] += 1
+            if offset not in written:
+                self.false_sharing[core] += 1
+
+        holders = [other for other in range(len(self.caches))
+                   if other != core and block_num in self.states[other]]
+        if holders:
+            self.transfers[core] += 1
+        return holders
+
+    def _invalidate_others(self, core, block_num, holders):
+        address = block_num * self.block_size
+        for other in holders:
+            self.caches[other].invalidate(address, self.memory)   # M copies write back
+            del self.states[other][block_num]
+            self.lost[other][block_num] = set()
+            self.invalidations[core] += 1
+
+    # ---------------- accesses ----------------
+    def read(self, core, address):
+        block_num, offset = divmod(address, self.block_size)
+        states = self.states[core]
+
+        if block_num not in states:
+            holders = self._miss(core, block_num, offset)
+            for other in holders:
+                if self.states[other][block_num] == "M":
+                    self.caches[other].clean(address, self.memory)
+                self.states[other][block_num] = "S"
+            value = self.caches[core].read(address, self.memory)
+            states[block_num] = "S" if holders else "E"
+            return value
+
+        return self.caches[core].read(address, self.memory)
+
+    def write(self, core, address, value):
+        block_num, offset = divmod(address, self.block_size)
+        states = self.states[core]
+
+        state = states.get(block_num)
+        if state is None:
+            holders = self._miss(core, block_num, offset)
+            self._invalidate_others(core, block_num, holders)
+        elif state == "S":
+            self.upgrades[core] += 1
+            holders = [other for other in range(len(self.caches))
+                       if other != core and block_num in self.states[other]]
+            self._invalidate_others(core, block_num, holders)
+
+        # Remember which bytes cores that lost the block now see changed
+        for other, lost in enumerate(self.lost):
+            if other != core and block_num in lost:
+                lost[block_num].add(offset)
+
+        self.caches[core].write(address, value, self.memory)
+        states[block_num] = "M"
+
+    def run(self, traces):
+        # traces: one access sequence per core, interleaved round-robin
+        # (one access per core per turn) until every trace is exhausted
+        for turn in itertools.zip_longest(*traces):
+            for core, step in enumerate(turn):
+                if step is None:
+                    continue
+                if step[0] == "read":
+                    self.read(core, step[1])
+                else:
+                    self.write(core, step[1], step[2])
+
+    def replay(self, events):
+        # events: (core, "read", addr) / (core, "write", addr, value) in global order
+        for event in events:
+            if event[1] == "read":
+                self.read(event[0], event[2])
+            else:
+                self.write(event[0], event[2], event[3])
+
+    # ---------------- reporting ----------------
+    def print_report(self):
+        for core, cache in enumerate(self.caches):
+            print(f"Core {core}: ", end="")
+            print_stats(cache.hits, cache.misses)
+            print(f"  coherence misses {self.coherence_misses[core]} "
+                  f"(false sharing {self.false_sharing[core]}), "
+                  f"invalidations sent {self.invalidations[core]}, "
+                  f"upgrades {self.upgrades[core]}, "
+                  f"cache-to-cache transfers {self.transfers[core]}, "
+                  f"writebacks {cache.writebacks}")
+        print("All cores: ", end="")
+        print_stats(sum(c.hits for c in self.caches), sum(c.misses for c in self.caches))
+
+
+def false_sharing_demo(padding, rounds=1000):
+    # Two cores each bump their own counter; `padding` bytes apart
+    system = CoherentSystem(2, 256, 32, "set:2", "LRU", 1024)
+    traces = [[("write", core * padding, i & 0xFF) for i in range(rounds)] for core in range(2)]
+    system.run(traces)
+    return system
+
+
+if __name__ == "__main__":
+    # python coherence.py CACHE_EXP BLOCK_EXP MAP_POLICY REPL_POLICY MEM_EXP TRACE [TRACE ...]
+    # (one trace per core); with no arguments, runs a false-sharing demo
+    if len(sys.argv) > 6:
+        cache_exp, block_exp, mapping, replacement, mem_exp = sys.argv[1:6]
+        system = CoherentSystem(len(sys.argv) - 6, 2 ** int(cache_exp), 2 ** int(block_exp),
+                                mapping.lower(), replacement.upper(), 2 ** int(mem_exp))
+        mem_size = 2 ** int(mem_exp)
+        system.run([
+            (step[:1] + (step[1] % mem_size,) + step[2:] for step in read_trace(path))
+            for path in sys.argv[6:]
+        ])
+        system.print_report()
+    else:
+        for padding in (1, 64):
+            print(f"=== Two counters {padding} byte(s) apart ===")
+            false_sharing_demo(padding).print_report()
@@ -86,10 +86,10 @@ def get_custom_configuration():
     # ----------------------------------------
     # REPLACEMENT POLICY
     # ----------------------------------------
-    valid_repl = {"RAND", "LRU", "FIFO", "LFU"}
+    valid_repl = {"RAND", "LRU", "FIFO", "LFU", "OPT"}
 
     while True:
-        replacement = input("Enter replacement policy (RAND, LRU, FIFO, LFU): ").strip().upper()
+        replacement = input("Enter replacement policy (RAND, LRU, FIFO, LFU, OPT): ").strip().upper()
         if replacement in valid_repl:
             break
         print(RED + "Invalid replacement policy." + RESET)
@@ -0,0 +1,29 @@
+# Shared by simulator.run_demo and hierarchy.run_hierarchy_demo, so the
+# hierarchy demo does not have to load the whole batch simulator
+
+# =========================================================
+# ANSI COLOR CODES
+# This is used to color terminal output for better readability
+# =========================================================
+RED     = "\033[91m"
+GREEN   = "\033[92m"
+YELLOW  = "\033[93m"
+CYAN    = "\033[96m"
+BOLD    = "\033[1m"
+RESET   = "\033[0m" # this makes the terminal colors normal again
+
+# =========================================================
+# Predefined Test Sequence (Used by all demos)
+# =========================================================
+TEST_SEQUENCE = [
+    ("read", 10),
+    ("read", 14),
+    ("read", 10),
+    ("write", 18, 7),
+    ("read", 18),
+    ("read", 50),
+    ("read", 58),
+    ("write", 90, 33),
+    ("read", 90),
+    ("read", 10),
+]
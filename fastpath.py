@@ -0,0 +1,219 @@
+# =========================================================
+# Specialized access paths
+# A Cache's configuration never changes after __init__, so instead of
+# re-checking write_policy / replacement_policy strings on every access,
+# bind_access_paths builds read/write routines for the selected
+# combination once and installs them on the instance:
+#   - address decode: shifts/masks (power-of-two geometry) or divmod
+#   - write policy:   one write routine each for WT, WB and WA; only WB
+#                     reads check the victim for a writeback
+#   - replacement:    choose_victim is the policy's victim() itself, and
+#                     FIFO / RAND / direct-mapped hits skip the policy update
+#   - storage:        with CacheLine objects, hits update the line in place
+#                     instead of going through the store's methods
+# Like the generic path, every write keeps only the low 8 bits of the
+# value, so both stores and every memory backend hold the same bytes.
+# As in the generic path, a missing block is fetched BEFORE the victim is
+# chosen, so a lower level's back-invalidation never hits a line that is
+# mid-replacement. The generic methods on Cache stay available (Cache(..., specialize=False))
+# and behave identically.
+# =========================================================
+
+def bind_access_paths(cache):
+    tag_index = cache.tag_index
+    store = cache.store
+    policy = cache.policy
+    block_size = cache.block_size
+    num_sets = cache.num_sets
+    fill_line = cache.fill_line
+    write_back = cache.write_back
+
+    touch_line = store.touch
+    read_byte = store.read_byte
+    write_byte = store.write_byte
+    mark_dirty = store.mark_dirty
+    is_dirty = store.is_dirty
+    victim = policy.victim
+
+    # Object storage: hits touch the CacheLine directly
+    lines = getattr(store, "lines", None)
+
+    # Hits only need a policy update when recency/frequency matters
+    if cache.associativity == 1 or cache.replacement_policy in ("FIFO", "RAND"):
+        policy_touch = None
+    else:
+        policy_touch = policy.touch
+
+    write_policy = cache.write_policy
+
+    # ---------------- reads ----------------
+    def read_decoded(block_num, tag, set_index, offset, memory):
+        cache.clock += 1
+        line_num = tag_index[set_index].get(tag)
+        if line_num is not None:
+            cache.hits += 1
+            if policy_touch is not None:
+                policy_touch(set_index, line_num, cache.clock)
+            if lines is not None:
+                line = lines[line_num]
+                line.last_used = cache.clock
+                line.use_count += 1
+                return line.data[offset]
+            touch_line(line_num, cache.clock)
+            return read_byte(line_num, offset)
+
+        cache.misses += 1
+        block_data = memory.read_block(block_num, block_size)
+        line_num = victim(set_index)
+        if is_dirty(line_num):
+            write_back(set_index, line_num, memory)
+        fill_line(set_index, line_num, tag, block_data)
+        return read_byte(line_num, offset)
+
+    def read_decoded_clean(block_num, tag, set_index, offset, memory):
+        # WT / WA: lines are never dirty, so a miss never writes back
+        cache.clock += 1
+        line_num = tag_index[set_index].get(tag)
+        if line_num is not None:
+            cache.hits += 1
+            if policy_touch is not None:
+                policy_touch(set_index, line_num, cache.clock)
+            if lines is not None:
+                line = lines[line_num]
+                line.last_used = cache.clock
+                line.use_count += 1
+                return line.data[offset]
+            touch_line(line_num, cache.clock)
+            return read_byte(line_num, offset)
+
+        cache.misses += 1
+        block_data = memory.read_block(block_num, block_size)
+        line_num = victim(set_index)
+        fill_line(set_index, line_num, tag, block_data)
+        return read_byte(line_num, offset)
+
+    # ---------------- writes ----------------
+    def write_decoded_wb(address, value, block_num, tag, set_index, offset, memory):
+        cache.clock += 1
+        value &= 0xFF
+        line_num = tag_index[set_index].get(tag)
+        if line_num is None:
+            cache.misses += 1
+            block_data = memory.read_block(block_num, block_size)
+            line_num = victim(set_index)
+            if is_dirty(line_num):
+                write_back(set_index, line_num, memory)
+            fill_line(set_index, line_num, tag, block_data)
+        else:
+            cache.hits += 1
+            if policy_touch is not None:
+                policy_touch(set_index, line_num, cache.clock)
+            if lines is not None:
+                line = lines[line_num]
+                line.last_used = cache.clock
+                line.use_count += 1
+                line.data[offset] = value
+                line.dirty = True
+                return
+            touch_line(line_num, cache.clock)
+        write_byte(line_num, offset, value)
+        mark_dirty(line_num)
+
+    def write_decoded_wt(address, value, block_num, tag, set_index, offset, memory):
+        cache.clock += 1
+        value &= 0xFF
+        line_num = tag_index[set_index].get(tag)
+        if line_num is None:
+            cache.misses += 1
+            block_data = memory.read_block(block_num, block_size)
+            line_num = victim(set_index)
+            fill_line(set_index, line_num, tag, block_data)
+        else:
+            cache.hits += 1
+            if policy_touch is not None:
+                policy_touch(set_index, line_num, cache.clock)
+            if lines is not None:
+                line = lines[line_num]
+                line.last_used = cache.clock
+                line.use_count += 1
+                line.data[offset] = value
+                memory.write_byte(address, value)
+                return
+            touch_line(line_num, cache.clock)
+        write_byte(line_num, offset, value)
+        memory.write_byte(address, value)
+
+    def write_decoded_wa(address, value, block_num, tag, set_index, offset, memory):
+        cache.clock += 1
+        value &= 0xFF
+        line_num = tag_index[set_index].get(tag)
+        if line_num is None:
+            cache.misses += 1               # No allocation on a write miss
+        else:
+            cache.hits += 1
+            if policy_touch is not None:
+                policy_touch(set_index, line_num, cache.clock)
+            if lines is not None:
+                line = lines[line_num]
+                line.last_used = cache.clock
+                line.use_count += 1
+                line.data[offset] = value
+            else:
+                write_byte(line_num, offset, value)
+                touch_line(line_num, cache.clock)
+        memory.write_byte(address, value)
+
+    if write_policy == "WB":
+        read_path = read_decoded
+    else:
+        read_path = read_decoded_clean
+    write_path = {
+        "WB": write_decoded_wb,
+        "WT": write_decoded_wt,
+        "WA": write_decoded_wa,
+    }[write_policy]
+
+    cache.read_decoded = read_path
+    cache.write_decoded = write_path
+    cache.choose_victim = victim
+    bind_decoders(cache)
+
+
+def bind_decoders(cache):
+    # (Re)builds cache.read / cache.write over the cache's current
+    # read_decoded / write_decoded: shifts and masks for power-of-two
+    # geometry, divmod otherwise. Components that wrap the decoded
+    # routines (prefetch, instrument, timing) call it after wrapping.
+    read_decoded = cache.read_decoded
+    write_decoded = cache.write_decoded
+    block_size = cache.block_size
+    num_sets = cache.num_sets
+
+    if cache.pow2:
+        offset_bits = cache.offset_bits
+        offset_mask = block_size - 1
+        set_bits = cache.set_bits
+        set_mask = num_sets - 1
+
+        def read(address, memory):
+            block_num = address >> offset_bits
+            return read_decoded(block_num, block_num >> set_bits, block_num & set_mask,
+                                address & offset_mask, memory)
+
+        def write(address, value, memory):
+            block_num = address >> offset_bits
+            write_decoded(address, value, block_num, block_num >> set_bits, block_num & set_mask,
+                          address & offset_mask, memory)
+    else:
+        def read(address, memory):
+            block_num, offset = divmod(address, block_size)
+            tag, set_index = divmod(block_num, num_sets)
+            return read_decoded(block_num, tag, set_index, offset, memory)
+
+        def write(address, value, memory):
+            block_num, offset = divmod(address, block_size)
+            tag, set_index = divmod(block_num, num_sets)
+            write_decoded(address, value, block_num, tag, set_index, offset, memory)
+
+    cache.read = read
+    cache.write = write
@@ -0,0 +1,241 @@
+import sys
+
+from cache import Cache
+from mainMem import Memory
+from demo import TEST_SEQUENCE, BOLD, CYAN, GREEN, RED, YELLOW, RESET
+from util import get_associativity, print_stats
+
+# =========================================================
+# Multi-level cache hierarchy (L1 / L2 / L3 ...)
+# Every level below L1 is wrapped in a LowerLevel, which offers the
+# same read_block / write_block / read_byte / write_byte interface as
+# Memory. The level above simply uses it as its "memory": an L1 miss
+# becomes an L2 block request, and dirty evictions flow down the chain.
+#
+# Inclusion policies:
+#   non-inclusive - every level fills on a miss, no back-invalidation
+#   inclusive     - like non-inclusive, and a block evicted from a level
+#                   is invalidated in every level above it
+#   exclusive     - a block lives in at most one level: an L2 hit moves
+#                   the block up into L1, and blocks evicted from L1
+#                   (clean or dirty) are placed in L2. Lower levels do
+#                   not fill on a miss. Needs equal block sizes.
+# =========================================================
+
+INCLUSION_POLICIES = ("non-inclusive", "inclusive", "exclusive")
+
+
+class LowerLevel:
+    # Backing-store view of one cache level (L2 and below)
+    def __init__(self, cache, below, exclusive=False, memory=None):
+        self.cache = cache
+        self.below = below              # Memory or another LowerLevel
+        self.exclusive = exclusive
+        self.memory = memory or below   # Main memory at the bottom of the chain
+
+        # Demand requests from the level above (writebacks not included)
+        self.hits = 0
+        self.misses = 0
+
+    def read_block(self, block_num, block_size):
+        address = block_num * block_size
+
+        if self.cache.contains(address):
+            self.hits += 1
+        else:
+            self.misses += 1
+            if self.exclusive:
+                # Lower levels of an exclusive hierarchy do not fill on a miss
+                return list(self.below.read_block(block_num, block_size))
+
+        data = list(self.cache.read_block(address, block_size, self.below))
+        if self.exclusive:
+            # Move the block up: it now lives only in the level above.
+            # A dirty copy goes straight to main memory (not the next
+            # level, which must not hold the block) so nothing is lost.
+            self.cache.invalidate(address, self.memory)
+        return data
+
+    def write_block(self, block_num, block_data):
+        # Dirty block evicted from the level above
+        address = block_num * len(block_data)
+        if self.exclusive:
+            if self.cache.write_policy == "WB":
+                self.cache.install_block(address, block_data, self.below, dirty=True)
+            else:
+                # Write-through levels keep the block clean; the data goes
+                # to main memory, since the next level must not get a copy
+                self.memory.write_block(block_num, block_data)
+                self.cache.install_block(address, block_data, self.below)
+        else:
+            self.cache.write_block(address, block_data, self.below)
+
+    def read_byte(self, address):
+        return self.cache.read(address, self.below)
+
+    def write_byte(self, address, value):
+        # Write-through / write-around traffic from the level above
+        if self.exclusive and not self.cache.contains(address):
+            self.below.write_byte(address, value)
+        else:
+            self.cache.write(address, value, self.below)
+
+
+class CacheHierarchy:
+    def __init__(self, levels, memory, inclusion="non-inclusive", memory_latency=100):
+        # levels: [(Cache, hit_latency_in_cycles), ...] from L1 downwards
+        if inclusion not in INCLUSION_POLICIES:
+            raise ValueError(f"Unknown inclusion policy: {inclusion}")
+
+        self.caches = [cache for cache, _ in levels]
+        self.latencies = [latency for _, latency in levels]
+        self.memory = memory
+        self.memory_latency = memory_latency
+        self.inclusion = inclusion
+        exclusive = inclusion == "exclusive"
+
+        for upper, lower in zip(self.caches, self.caches[1:]):
+            if lower.block_size < upper.block_size:
+                raise ValueError("Lower levels need block sizes >= the level above.")
+            if exclusive and lower.block_size != upper.block_size:
+                raise ValueError("Exclusive hierarchies need equal block sizes.")
+
+        # Build the backing-store chain bottom-up: L1 -> L2 -> ... -> Memory
+        below = memory
+        self.lower_levels = []
+        for cache in reversed(self.caches[1:]):
+            below = LowerLevel(cache, below, exclusive, memory)
+            self.lower_levels.insert(0, below)
+        self.top = below
+
+        if inclusion == "inclusive":
+            for k in range(1, len(self.caches)):
+                self.caches[k].on_evict = self._back_invalidate(k)
+        elif exclusive:
+            for k in range(len(self.caches) - 1):
+                self.caches[k].on_evict = self._spill_clean(k)
+
+    def _back_invalidate(self, k):
+        # Inclusive: a block leaving level k leaves every level above it.
+        # Dirty upper copies are newer, so they go to level k's backing
+        # store, nearest level first and L1 last.
+        lower = self.caches[k]
+        backing = self.lower_levels[k] if k < len(self.lower_levels) else self.memory
+
+        def on_evict(block_num, block_data, dirty):
+            start = block_num * lower.block_size
+            for upper in reversed(self.caches[:k]):
+                for address in range(start, start + lower.block_size, upper.block_size):
+                    upper.invalidate(address, backing)
+        return on_evict
+
+    def _spill_clean(self, k):
+        # Exclusive: clean victims of level k move down into level k + 1
+        # (dirty ones already arrive through write_block)
+        lower = self.lower_levels[k]
+
+        def on_evict(block_num, block_data, dirty):
+            if not dirty:
+                lower.cache.install_block(block_num * lower.cache.block_size,
+                                          list(block_data), lower.below)
+        return on_evict
+
+    def read(self, address):
+        return self.caches[0].read(address, self.top)
+
+    def write(self, address, value):
+        self.caches[0].write(address, value, self.top)
+
+    def replay(self, sequence):
+        for step in sequence:
+            if step[0] == "read":
+                self.read(step[1])
+            else:
+                self.write(step[1], step[2])
+
+    def level_stats(self):
+        # [(hits, misses)] per level, counting demand accesses only
+        stats = [(self.caches[0].hits, self.caches[0].misses)]
+        stats += [(level.hits, level.misses) for level in self.lower_levels]
+        return stats
+
+    def amat(self):
+        # AMAT = t1 + m1 * (t2 + m2 * (... + memory_latency)), built bottom-up
+        # from each level's local miss ratio
+        time = self.memory_latency
+        for (hits, misses), latency in reversed(list(zip(self.level_stats(), self.latencies))):
+            total = hits + misses
+            miss_ratio = misses / total if total else 0
+            time = latency + miss_ratio * time
+        return time
+
+    def print_report(self):
+        for i, ((hits, misses), latency) in enumerate(zip(self.level_stats(), self.latencies)):
+            print(f"L{i + 1} ({latency} cycles): ", end="")
+            print_stats(hits, misses)
+        print(f"Memory: {self.memory_latency} cycles")
+        print(f"AMAT: {self.amat():.2f} cycles")
+
+
+def build_hierarchy(mem_size, levels, inclusion="non-inclusive", memory_latency=100):
+    # levels: dicts with cache_size, block_size, mapping, replacement, write, latency
+    caches = []
+    for level in levels:
+        cache = Cache(
+            level["cache_size"],
+            level["block_size"],
+            associativity=get_associativity(level["mapping"], level["cache_size"] // level["block_size"]),
+            replacement_policy=level["replacement"],
+            write_policy=level["write"],
+        )
+        caches.append((cache, level["latency"]))
+    return CacheHierarchy(caches, Memory(mem_size), inclusion, memory_latency)
+
+
+def run_hierarchy_demo(name, mem_size, levels, inclusion="non-inclusive",
+                       memory_latency=100, sequence=None):
+    # run_demo for a hierarchy: per-access lines colored by the L1 outcome,
+    # then per-level stats and AMAT
+    print(f"\n{BOLD}=== Running Hierarchy Demo: {name} ==={RESET}")
+    print(f"{CYAN}Configuration:{RESET}")
+    print(f"  Memory size:   {mem_size}  ({memory_latency} cycles)")
+    print(f"  Inclusion:     {inclusion}")
+    for i, level in enumerate(levels):
+        print(f"  L{i + 1}: {level['cache_size']} B, {level['block_size']} B blocks, "
+              f"{level['mapping']}, {level['replacement']}, {level['write']}, "
+              f"{level['latency']} cycles")
+    print(f"{BOLD}==========================================\n")
+
+    hierarchy = build_hierarchy(mem_size, levels, inclusion, memory_latency)
+    l1 = hierarchy.caches[0]
+
+    for step in (sequence if sequence else TEST_SEQUENCE):
+        before_hits = l1.hits
+        if step[0] == "read":
+            val = hierarchy.read(step[1])
+            color = GREEN if l1.hits > before_hits else RED
+            print(f"{color}READ   addr={step[1]:3d} → value={val:3d}{RESET}")
+        else:
+            hierarchy.write(step[1], step[2])
+            color = GREEN if l1.hits > before_hits else RED
+            print(f"{YELLOW}WRITE  addr={step[1]:3d},  value={step[2]:3d}{RESET} {color}"
+                  f"({'hit' if l1.hits > before_hits else 'miss'}){RESET}")
+
+    print(f"\n{BOLD}=== FINAL RESULTS ==={RESET}")
+    hierarchy.print_report()
+    print("=====================\n")
+    return hierarchy
+
+
+# Two-level example used when run directly
+EXAMPLE_LEVELS = [
+    {"cache_size": 64, "block_size": 8, "mapping": "direct", "replacement": "LRU",
+     "write": "WB", "latency": 1},
+    {"cache_size": 256, "block_size": 8, "mapping": "set:4", "replacement": "LRU",
+     "write": "WB", "latency": 10},
+]
+
+
+if __name__ == "__main__":
+    inclusion = sys.argv[1] if len(sys.argv) > 1 else "non-inclusive"
+    run_hierarchy_demo("L1 direct + L2 4-way", 1024, EXAMPLE_LEVELS, inclusion)
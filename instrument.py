@@ -0,0 +1,175 @@
+from array import array
+from collections import OrderedDict
+
+from fastpath import bind_decoders
+
+# =========================================================
+# Instrumentation
+# Attaches to one Cache the same way prefetch.Prefetcher does: the
+# cache's access routines are wrapped only when an Instrumentation is
+# attached, so an uninstrumented cache runs its normal (specialized)
+# paths with no extra checks at all.
+#
+# Provides:
+#   - event callbacks, each optional:
+#       on_hit(block_num, set_index, is_write)
+#       on_miss(block_num, set_index, is_write, kind)   kind: see below
+#       on_fill(block_num, set_index)
+#       on_evict(block_num, dirty)
+#       on_writeback(block_num, num_bytes)
+#   - 3C miss classification against a shadow fully-associative LRU
+#     cache with the same number of lines (and the same allocate rule):
+#       compulsory - first reference to the block
+#       capacity   - the shadow cache misses too
+#       conflict   - the shadow cache would have hit
+#   - per-set access and miss counts (heatmaps)
+#   - writeback counts in blocks and bytes
+# =========================================================
+
+COMPULSORY = "compulsory"
+CAPACITY = "capacity"
+CONFLICT = "conflict"
+
+HEAT_CHARS = " .:-=+*#%@"      # Lowest to highest count
+
+
+class Instrumentation:
+    def __init__(self, on_hit=None, on_miss=None, on_fill=None, on_evict=None,
+                 on_writeback=None, classify=True):
+        self.on_hit = on_hit
+        self.on_miss = on_miss
+        self.on_fill = on_fill
+        self.on_evict = on_evict
+        self.on_writeback = on_writeback
+        self.classify = classify
+        self.cache = None
+
+        # 3C classifier state
+        self.seen = set()                   # Blocks referenced so far
+        self.shadow = OrderedDict()         # Fully-associative LRU, oldest first
+        self.compulsory = 0
+        self.capacity = 0
+        self.conflict = 0
+
+        self.evictions = 0
+        self.writebacks = 0
+        self.writeback_bytes = 0
+
+    # ---------------- hooking into a Cache ----------------
+    def attach(self, cache):
+        self.cache = cache
+        self.set_accesses = array("Q", bytes(8 * cache.num_sets))
+        self.set_misses = array("Q", bytes(8 * cache.num_sets))
+        self.shadow_lines = cache.num_lines
+        write_around = cache.write_policy == "WA"
+        write_back = cache.write_policy == "WB"
+        block_size = cache.block_size
+
+        inner_read = cache.read_decoded
+        inner_write = cache.write_decoded
+        prev_evict = cache.on_evict
+
+        def read_decoded(block_num, tag, set_index, offset, memory):
+            misses = cache.misses
+            value = inner_read(block_num, tag, set_index, offset, memory)
+            self.record(block_num, set_index, False, cache.misses != misses, True)
+            return value
+
+        def write_decoded(address, value, block_num, tag, set_index, offset, memory):
+            misses = cache.misses
+            inner_write(address, value, block_num, tag, set_index, offset, memory)
+            self.record(block_num, set_index, True, cache.misses != misses, not write_around)
+
+        def on_evict(block_num, block_data, dirty):
+            # fill_line reports the victim after its writeback, so a dirty
+            # victim of a WB cache has just been written back
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(block_num, dirty)
+            if dirty and write_back:
+                self.writebacks += 1
+                self.writeback_bytes += block_size
+                if self.on_writeback is not None:
+                    self.on_writeback(block_num, block_size)
+            if prev_evict is not None:
+                prev_evict(block_num, block_data, dirty)
+
+        cache.read_decoded = read_decoded
+        cache.write_decoded = write_decoded
+        bind_decoders(cache)
+        cache.on_evict = on_evict
+        return self
+
+    def record(self, block_num, set_index, is_write, miss, allocates):
+        # One demand access; `allocates` says whether a miss fills the block
+        self.set_accesses[set_index] += 1
+
+        kind = None
+        if self.classify:
+            shadow = self.shadow
+            in_shadow = block_num in shadow
+            if in_shadow:
+                shadow.move_to_end(block_num)
+            elif allocates:
+                if len(shadow) == self.shadow_lines:
+                    shadow.popitem(last=False)
+                shadow[block_num] = None
+
+            if miss:
+                if block_num not in self.seen:
+                    kind = COMPULSORY
+                    self.compulsory += 1
+                elif in_shadow:
+                    kind = CONFLICT
+                    self.conflict += 1
+                else:
+                    kind = CAPACITY
+                    self.capacity += 1
+            self.seen.add(block_num)
+
+        if miss:
+            self.set_misses[set_index] += 1
+            if self.on_miss is not None:
+                self.on_miss(block_num, set_index, is_write, kind)
+            if allocates and self.on_fill is not None:
+                self.on_fill(block_num, set_index)
+        elif self.on_hit is not None:
+            self.on_hit(block_num, set_index, is_write)
+
+    # ---------------- reporting ----------------
+    def miss_breakdown(self):
+        return {COMPULSORY: self.compulsory, CAPACITY: self.capacity, CONFLICT: self.conflict}
+
+    def stats(self):
+        # Scalar counters for structured reports (the per-set arrays are left out)
+        return {
+            "compulsory": self.compulsory,
+            "capacity": self.capacity,
+            "conflict": self.conflict,
+            "evictions": self.evictions,
+            "writebacks": self.writebacks,
+            "writeback_bytes": self.writeback_bytes,
+        }
+
+    def heatmap(self, counts, width=64):
+        # One character per set, scaled to the busiest set; wraps every `width` sets
+        top = max(counts) if len(counts) else 0
+        chars = [HEAT_CHARS[(c * (len(HEAT_CHARS) - 1) + top - 1) // top] if top else " "
+                 for c in counts]
+        return ["".join(chars[i:i + width]) for i in range(0, len(chars), width)]
+
+    def print_report(self, top=5):
+        total = self.compulsory + self.capacity + self.conflict
+        if self.classify and total:
+            print("Misses: " + ", ".join(
+                f"{kind} {count} ({100 * count / total:.1f}%)"
+                for kind, count in self.miss_breakdown().items()))
+        print(f"Evictions: {self.evictions}, Writebacks: {self.writebacks} "
+              f"({self.writeback_bytes} bytes)")
+
+        busiest = sorted(range(len(self.set_misses)), key=lambda s: -self.set_misses[s])[:top]
+        print("Most missed sets: " + ", ".join(
+            f"{s} ({self.set_misses[s]}/{self.set_accesses[s]})" for s in busiest))
+        print("Set miss heatmap:")
+        for row in self.heatmap(self.set_misses):
+            print(f"  |{row}|")
@@ -1,7 +1,10 @@
+import mmap, tempfile
+
 class Memory:
     def __init__(self, size):
         # Initialize main memory with a fixed size
         # Each memory address (byte) starts with value 0
+        self.size = size
         self.data = [0] * size
 
     def read_block(self, block_num, block_size):
@@ -15,8 +18,7 @@ class Memory:
     def write_block(self, block_num, block_data):
         # Writes an entire block of data back to memory.
         start = block_num * len(block_data)        # Find the start index of the block
-        for i in range(len(block_data)):           # Copy each byte into memory
-            self.data[start + i] = block_data[i]
+        self.data[start:start + len(block_data)] = block_data   # Copy the block in one slice
 
     def read_byte(self, address):
         # Reads a single byte from a specific memory address
@@ -25,3 +27,155 @@ class Memory:
     def write_byte(self, address, value):
         # Writes a single byte to a specific memory address
         self.data[address] = value
+
+
+# =========================================================
+# Alternative backends for large (32/64-bit) address spaces
+# Same read_block / write_block / read_byte / write_byte interface
+# as Memory, but bytes are stored in bytearrays (values 0-255) and
+# blocks are handed out as zero-copy memoryview slices. Callers that
+# keep a block must copy it (CacheLine.load_block does).
+# =========================================================
+
+class SparseMemory:
+    def __init__(self, size, page_size=4096):
+        # Pages are allocated on first write; untouched pages read as zero
+        self.size = size
+        self.page_size = page_size
+        self.pages = {}                            # page number -> bytearray
+        self.zero_page = bytes(page_size)
+
+    def _page(self, page_num):
+        # Returns the page, allocating it on first touch
+        page = self.pages.get(page_num)
+        if page is None:
+            page = self.pages[page_num] = bytearray(self.page_size)
+        return page
+
+    def read_block(self, block_num, block_size):
+        start = block_num * block_size
+        page_num, offset = divmod(start, self.page_size)
+
+        # Common case: the block sits inside one page -> zero-copy slice
+        if offset + block_size <= self.page_size:
+            page = self.pages.get(page_num, self.zero_page)
+            return memoryview(page)[offset:offset + block_size]
+
+        # Block spans pages (block_size > page_size): gather into a copy
+        return memoryview(bytes(self.read_byte(a) for a in range(start, start + block_size)))
+
+    def write_block(self, block_num, block_data):
+        size = len(block_data)
+        start = block_num * size
+        page_num, offset = divmod(start, self.page_size)
+
+        if offset + size <= self.page_size:
+            self._page(page_num)[offset:offset + size] = block_data
+            return
+
+        for i in range(size):
+            self.write_byte(start + i, block_data[i])
+
+    def read_byte(self, address):
+        page_num, offset = divmod(address, self.page_size)
+        page = self.pages.get(page_num)
+        return page[offset] if page is not None else 0
+
+    def write_byte(self, address, value):
+        page_num, offset = divmod(address, self.page_size)
+        self._page(page_num)[offset] = value
+
+    def resident_bytes(self):
+        # Bytes actually allocated for the pages the trace touched
+        return len(self.pages) * self.page_size
+
+
+class MappedMemory:
+    def __init__(self, size, path=None, offset=0, copy_on_write=False):
+        # Backed by a memory-mapped file (a temporary one when no path
+        # is given). The OS only commits pages that are touched, so
+        # the file is sparse and huge address spaces stay cheap.
+        # copy_on_write maps `size` bytes of an existing file at `offset`
+        # privately: writes never reach the file (used to restore
+        # checkpoints). Private mappings are charged against memory
+        # up front, so they suit moderate sizes only.
+        self.size = size
+        self.path = path
+
+        if copy_on_write:
+            with open(path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_COPY, offset=offset)
+            self.data = memoryview(self.map)
+            return
+
+        # A shared file mapping needs no swap reservation, unlike a large
+        # anonymous one, so without a path an unnamed temp file is used
+        with (open(path, "a+b") if path else tempfile.TemporaryFile()) as f:
+            f.truncate(size)
+            self.map = mmap.mmap(f.fileno(), size)
+
+        self.data = memoryview(self.map)
+
+    def read_block(self, block_num, block_size):
+        start = block_num * block_size
+        return self.data[start:start + block_size]     # Zero-copy slice
+
+    def write_block(self, block_num, block_data):
+        start = block_num * len(block_data)
+        if isinstance(block_data, list):
+            block_data = bytes(block_data)         # CacheLine data is a list of ints
+        self.data[start:start + len(block_data)] = block_data
+
+    def read_byte(self, address):
+        return self.data[address]
+
+    def write_byte(self, address, value):
+        self.data[address] = value
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        self.data.release()
+        self.map.close()
+
+
+MEMORY_BACKENDS = {
+    "list": Memory,
+    "sparse": SparseMemory,
+    "mmap": MappedMemory,
+}
+
+# Above this size a flat list is impractical, so "auto" goes sparse
+LIST_MEMORY_LIMIT = 1 << 24
+
+# Largest "list" memory: one 8-byte reference per byte, 2 GiB already
+LIST_MEMORY_MAX = 1 << 28
+
+# Largest file most filesystems allow (ext4 stops just short of 2^44),
+# hence the largest "mmap" memory
+MAPPED_MEMORY_LIMIT = 1 << 43
+
+
+def check_memory(size, backend):
+    # Raises ValueError when the backend cannot hold `size` bytes
+    if backend == "list" and size > LIST_MEMORY_MAX:
+        raise ValueError(f"list memory is limited to 2^{LIST_MEMORY_MAX.bit_length() - 1} bytes "
+                         f"(one Python reference per byte); use the sparse backend (--memory sparse) instead.")
+    if backend == "mmap" and size > MAPPED_MEMORY_LIMIT:
+        raise ValueError(f"mmap memory is limited to 2^{MAPPED_MEMORY_LIMIT.bit_length() - 1} bytes "
+                         f"(the backing file cannot be larger); use the sparse backend (--memory sparse) instead.")
+
+
+def make_memory(size, backend="auto"):
+    if backend == "auto":
+        backend = "list" if size <= LIST_MEMORY_LIMIT else "sparse"
+    if backend not in MEMORY_BACKENDS:
+        raise ValueError(f"Unknown memory backend: {backend}")
+    check_memory(size, backend)
+    try:
+        return MEMORY_BACKENDS[backend](size)
+    except (OSError, OverflowError) as e:
+        if backend != "mmap":
+            raise
+        raise ValueError(f"Cannot map {size} bytes of memory ({e}); use the sparse backend (--memory sparse) instead.")
@@ -0,0 +1,266 @@
+from collections import OrderedDict, deque
+
+from fastpath import bind_decoders
+
+# =========================================================
+# Hardware prefetchers
+# A prefetcher is attached to one Cache and watches its demand stream:
+# every demand miss, and the first demand hit on a prefetched line
+# (tagged prefetching), trains it and may issue prefetches. A prefetch
+# is filled into its set through the normal victim path
+# (Cache.allocate -> choose_victim / fill_line -> store.load_block),
+# so it competes with demand lines under the cache's own policies.
+#
+# Prefetched lines are tagged until their first demand use, which gives:
+#   accuracy   - useful prefetches / prefetches filled
+#   coverage   - useful prefetches / (useful + remaining demand misses)
+#   timeliness - late prefetches (still in flight when the demand access
+#                arrived) and the mean lead, in accesses, from fill to use
+#   pollution  - demand misses on blocks that a prefetch had evicted
+#
+# With latency=0 prefetches fill at once; latency=N holds each one in
+# flight for N cache accesses first.
+# OPT replacement cannot be prefetched into: its next-use index is per
+# trace access, and a prefetched block is not the block of the access
+# that triggered it, so the fill would be ranked by the wrong next use.
+# =========================================================
+
+class Prefetcher:
+    def __init__(self, degree=1, latency=0):
+        self.degree = degree            # Blocks issued per trigger
+        self.latency = latency          # Accesses before an issued prefetch fills
+        self.cache = None
+
+        self.prefetched = {}            # Block number -> clock at fill, until first use
+        self.displaced = set()          # Demand blocks evicted by a prefetch fill
+        self.in_flight = {}             # Block number -> clock when it fills
+        self.queue = deque()            # In-flight blocks, oldest first
+        self.filling = False            # True while a prefetch fill runs
+
+        self.issued = 0                 # Prefetches sent (not already cached or in flight)
+        self.fills = 0                  # Prefetches that reached the cache
+        self.useful = 0                 # Filled lines later hit by a demand access
+        self.useless = 0                # Filled lines evicted without a demand access
+        self.late = 0                   # Demand misses on blocks still in flight
+        self.pollution = 0              # Demand misses caused by prefetch evictions
+        self.demand_misses = 0
+        self.lead_total = 0             # Sum of (first use - fill) over useful lines
+
+    # ---------------- training (subclasses) ----------------
+    def predict(self, block_num, miss):
+        # Block numbers to prefetch after a trigger on block_num
+        raise NotImplementedError
+
+    # ---------------- hooking into a Cache ----------------
+    def attach(self, cache):
+        # Wraps the cache's (possibly specialized) access routines.
+        # Plain hits on untagged lines only pay one dict lookup.
+        if cache.replacement_policy == "OPT":
+            raise ValueError("Prefetching cannot be combined with OPT replacement.")
+        self.cache = cache
+        inner_read = cache.read_decoded
+        inner_write = cache.write_decoded
+        prev_evict = cache.on_evict
+        prefetched = self.prefetched
+
+        def read_decoded(block_num, tag, set_index, offset, memory):
+            if self.queue:
+                self.drain(memory)
+            tagged = block_num in prefetched
+            misses = cache.misses
+            value = inner_read(block_num, tag, set_index, offset, memory)
+            if tagged or cache.misses != misses:
+                self.observe(block_num, cache.misses != misses, memory)
+            return value
+
+        def write_decoded(address, value, block_num, tag, set_index, offset, memory):
+            if self.queue:
+                self.drain(memory)
+            tagged = block_num in prefetched
+            misses = cache.misses
+            inner_write(address, value, block_num, tag, set_index, offset, memory)
+            if tagged or cache.misses != misses:
+                self.observe(block_num, cache.misses != misses, memory)
+
+        def on_evict(block_num, block_data, dirty):
+            if block_num in prefetched:
+                del prefetched[block_num]
+                self.useless += 1
+            elif self.filling:
+                self.displaced.add(block_num)
+            if prev_evict is not None:
+                prev_evict(block_num, block_data, dirty)
+
+        cache.read_decoded = read_decoded
+        cache.write_decoded = write_decoded
+        bind_decoders(cache)
+        cache.on_evict = on_evict
+        return self
+
+    def observe(self, block_num, miss, memory):
+        if miss:
+            self.demand_misses += 1
+            if block_num in self.displaced:
+                self.displaced.discard(block_num)
+                self.pollution += 1
+            if block_num in self.in_flight:
+                # Demand fetch overtook the prefetch; the queue entry is skipped later
+                del self.in_flight[block_num]
+                self.late += 1
+        else:
+            # First demand use of a prefetched line
+            self.useful += 1
+            self.lead_total += self.cache.clock - self.prefetched.pop(block_num)
+
+        for target in self.predict(block_num, miss):
+            self.issue(target, memory)
+
+    # ---------------- issuing ----------------
+    def issue(self, block_num, memory):
+        cache = self.cache
+        if block_num < 0 or block_num in self.in_flight:
+            return
+        size = getattr(memory, "size", None)
+        if size is not None and block_num * cache.block_size >= size:
+            return
+        if cache.contains(block_num * cache.block_size):
+            return
+
+        self.issued += 1
+        if self.latency:
+            self.in_flight[block_num] = cache.clock + self.latency
+            self.queue.append(block_num)
+        else:
+            self.fill(block_num, memory)
+
+    def drain(self, memory):
+        # Fills every in-flight prefetch whose latency has passed
+        clock = self.cache.clock
+        while self.queue:
+            block_num = self.queue[0]
+            ready = self.in_flight.get(block_num)
+            if ready is not None and ready > clock:
+                break
+            self.queue.popleft()
+            if ready is not None:
+                del self.in_flight[block_num]
+                self.fill(block_num, memory)
+
+    def fill(self, block_num, memory):
+        cache = self.cache
+        if cache.contains(block_num * cache.block_size):
+            return
+        self.filling = True
+        cache.allocate(block_num, memory)
+        self.filling = False
+        self.displaced.discard(block_num)
+        self.prefetched[block_num] = cache.clock
+        self.fills += 1
+
+    # ---------------- statistics ----------------
+    def stats(self):
+        useful = self.useful
+        return {
+            "issued": self.issued,
+            "fills": self.fills,
+            "useful": useful,
+            "useless": self.useless,
+            "late": self.late,
+            "pollution": self.pollution,
+            "accuracy": useful / self.fills if self.fills else 0,
+            "coverage": useful / (useful + self.demand_misses) if useful + self.demand_misses else 0,
+            "mean_lead": self.lead_total / useful if useful else 0,
+        }
+
+    def print_report(self):
+        s = self.stats()
+        print(f"Prefetches: issued {s['issued']}, filled {s['fills']}, "
+              f"useful {s['useful']}, useless {s['useless']}, late {s['late']}")
+        print(f"Accuracy: {s['accuracy']:.2f}, Coverage: {s['coverage']:.2f}, "
+              f"Mean lead: {s['mean_lead']:.1f} accesses, Pollution: {s['pollution']} misses")
+
+
+class NextLinePrefetcher(Prefetcher):
+    # Fetches the next `degree` blocks after every trigger
+    def predict(self, block_num, miss):
+        return range(block_num + 1, block_num + 1 + self.degree)
+
+
+class StridePrefetcher(Prefetcher):
+    # No PCs in our traces, so strides are tracked per address region:
+    # each entry holds the region's last trigger block, its last delta
+    # and a confidence count. Once the same delta repeats `threshold`
+    # times, the next `degree` blocks along it are prefetched.
+    def __init__(self, degree=1, latency=0, table_size=64, region_bits=6, threshold=2):
+        super().__init__(degree, latency)
+        self.table_size = table_size
+        self.region_bits = region_bits      # Region = 2^region_bits blocks
+        self.threshold = threshold
+        self.table = OrderedDict()          # region -> [last block, stride, confidence]
+
+    def predict(self, block_num, miss):
+        region = block_num >> self.region_bits
+        entry = self.table.get(region)
+        if entry is None:
+            if len(self.table) == self.table_size:
+                self.table.popitem(last=False)      # Drop the least recently used region
+            self.table[region] = [block_num, 0, 0]
+            return ()
+
+        self.table.move_to_end(region)
+        delta = block_num - entry[0]
+        if delta == 0:
+            return ()
+        if delta == entry[1]:
+            entry[2] += 1
+        else:
+            entry[1] = delta
+            entry[2] = 1
+        entry[0] = block_num
+
+        if entry[2] < self.threshold:
+            return ()
+        return [block_num + delta * k for k in range(1, self.degree + 1)]
+
+
+class StreamBufferPrefetcher(Prefetcher):
+    # A few sequential streams, each running `depth` blocks ahead of its
+    # last use. A trigger inside a stream's window advances that stream;
+    # any other miss starts a new stream, replacing the least recently
+    # used one. (Streams fill into the cache, not a separate buffer.)
+    def __init__(self, degree=1, latency=0, num_streams=4, depth=4):
+        super().__init__(degree, latency)
+        self.num_streams = num_streams
+        self.depth = depth
+        self.streams = OrderedDict()        # stream id -> next block to prefetch
+        self.next_id = 0
+
+    def predict(self, block_num, miss):
+        for stream_id, next_block in self.streams.items():
+            if next_block - self.depth <= block_num < next_block:
+                # Hit in the stream window: stay `depth` blocks ahead
+                self.streams.move_to_end(stream_id)
+                end = block_num + self.depth + 1
+                self.streams[stream_id] = max(end, next_block)
+                return range(next_block, end)
+
+        if not miss:
+            return ()
+        if len(self.streams) == self.num_streams:
+            self.streams.popitem(last=False)
+        self.streams[self.next_id] = block_num + self.depth + 1
+        self.next_id += 1
+        return range(block_num + 1, block_num + self.depth + 1)
+
+
+PREFETCHERS = {
+    "next-line": NextLinePrefetcher,
+    "stride": StridePrefetcher,
+    "stream": StreamBufferPrefetcher,
+}
+
+
+def make_prefetcher(name, degree=1, latency=0):
+    if name not in PREFETCHERS:
+        raise ValueError(f"Unknown prefetcher: {name}")
+    return PREFETCHERS[name](degree, latency)
@@ -0,0 +1,284 @@
+from array import array
+from collections import OrderedDict
+import heapq, random
+
+# =========================================================
+# Replacement policies
+# Every policy tracks the lines of each set by line number
+# (set_index * associativity + way) and gives O(1) updates and
+# O(1) victim choice. `now` is the cache's monotonic access
+# counter, passed in so no policy ever reads the wall clock.
+#
+# Contract with Cache:
+#   victim(s)           -> line number to fill; the line stops being tracked
+#   insert(s, line, now) after the line is filled
+#   touch(s, line, now)  on every hit
+#   remove(s, line)      when the line is invalidated
+# =========================================================
+
+class ReplacementPolicy:
+    def __init__(self, num_sets, associativity, seed=0):
+        self.num_sets = num_sets
+        self.associativity = associativity
+
+        # Ways never filled yet, handed out in order (way 0 first)
+        self.unused = array("I", [0]) * num_sets
+        # Lines freed by invalidation, per set (only sets that have any)
+        self.free = {}
+
+    def victim(self, set_index):
+        # Empty lines are always used before anything is evicted
+        if self.unused[set_index] < self.associativity:
+            way = self.unused[set_index]
+            self.unused[set_index] += 1
+            return set_index * self.associativity + way
+
+        free = self.free.get(set_index)
+        if free:
+            line_num = free.pop()
+            if not free:
+                del self.free[set_index]
+            return line_num
+
+        return self.evict(set_index)
+
+    def remove(self, set_index, line_num):
+        self.forget(set_index, line_num)
+        self.free.setdefault(set_index, []).append(line_num)
+
+    def evict(self, set_index):
+        raise NotImplementedError
+
+    def forget(self, set_index, line_num):
+        raise NotImplementedError
+
+    def insert(self, set_index, line_num, now):
+        pass
+
+    def touch(self, set_index, line_num, now):
+        pass
+
+
+class LRUPolicy(ReplacementPolicy):
+    # Per-set recency list: oldest first, most recently used last
+    def __init__(self, num_sets, associativity, seed=0):
+        super().__init__(num_sets, associativity, seed)
+        self.order = {}
+
+    def insert(self, set_index, line_num, now):
+        order = self.order.get(set_index)
+        if order is None:
+            order = self.order[set_index] = OrderedDict()
+        order[line_num] = None
+
+    def touch(self, set_index, line_num, now):
+        self.order[set_index].move_to_end(line_num)
+
+    def evict(self, set_index):
+        return self.order[set_index].popitem(last=False)[0]
+
+    def forget(self, set_index, line_num):
+        del self.order[set_index][line_num]
+
+
+class FIFOPolicy(LRUPolicy):
+    # Insertion queue: same structure as LRU, but hits do not reorder it
+    def touch(self, set_index, line_num, now):
+        pass
+
+
+class LFUPolicy(ReplacementPolicy):
+    # Frequency buckets: use count -> lines with that count (oldest first).
+    # The smallest non-empty bucket is tracked so the victim is found in O(1).
+    def __init__(self, num_sets, associativity, seed=0):
+        super().__init__(num_sets, associativity, seed)
+        self.count = {}         # line number -> use count
+        self.buckets = {}       # set index -> {use count: OrderedDict of lines}
+        self.min_count = {}     # set index -> smallest use count in the set
+
+    def insert(self, set_index, line_num, now):
+        buckets = self.buckets.get(set_index)
+        if buckets is None:
+            buckets = self.buckets[set_index] = {}
+        self.count[line_num] = 0
+        buckets.setdefault(0, OrderedDict())[line_num] = None
+        self.min_count[set_index] = 0
+
+    def touch(self, set_index, line_num, now):
+        buckets = self.buckets[set_index]
+        count = self.count[line_num]
+
+        bucket = buckets[count]
+        del bucket[line_num]
+        if not bucket:
+            del buckets[count]
+            if self.min_count[set_index] == count:
+                self.min_count[set_index] = count + 1
+
+        self.count[line_num] = count + 1
+        buckets.setdefault(count + 1, OrderedDict())[line_num] = None
+
+    def evict(self, set_index):
+        buckets = self.buckets[set_index]
+        count = self.min_count[set_index]
+        bucket = buckets[count]
+
+        line_num = bucket.popitem(last=False)[0]
+        if not bucket:
+            del buckets[count]
+        del self.count[line_num]
+        return line_num
+
+    def forget(self, set_index, line_num):
+        buckets = self.buckets[set_index]
+        count = self.count.pop(line_num)
+
+        bucket = buckets[count]
+        del bucket[line_num]
+        if not bucket:
+            del buckets[count]
+            if self.min_count[set_index] == count and buckets:
+                self.min_count[set_index] = min(buckets)
+
+
+class RandomPolicy(ReplacementPolicy):
+    # Seeded RNG so RAND runs are reproducible
+    def __init__(self, num_sets, associativity, seed=0):
+        super().__init__(num_sets, associativity, seed)
+        self.rng = random.Random(seed)
+
+    def evict(self, set_index):
+        return set_index * self.associativity + self.rng.randrange(self.associativity)
+
+    def forget(self, set_index, line_num):
+        pass
+
+
+# =========================================================
+# Belady's MIN (OPT): evicts the line whose block is used furthest in
+# the future. Needs the trace up front, as a next-use index built by
+# build_next_use: future[i] = position of the next access to the block
+# of access i (NEVER if there is none). The cache clock numbers the
+# accesses (clock - 1 is the current position), so the index must
+# cover exactly the accesses the cache sees, in order, from clock 0.
+# Each set keeps a max-heap on next use with lazy deletion: stale
+# entries are skipped when popped, and the heap is rebuilt when it
+# grows well past the set's size.
+# A policy restored from a checkpoint only knows the index of the
+# trace prefix it was saved on; reindex installs the full trace's index
+# and re-keys the cached lines (see checkpoint.resume_opt).
+# =========================================================
+
+NEVER = (1 << 64) - 1
+
+
+def build_next_use(addrs, block_size):
+    # One backward pass over the trace's addresses
+    n = len(addrs)
+    future = array("Q", [NEVER]) * n
+    last = {}
+    for i in range(n - 1, -1, -1):
+        block_num = addrs[i] // block_size
+        future[i] = last.get(block_num, NEVER)
+        last[block_num] = i
+    return future
+
+
+def first_uses(addrs, block_size, start):
+    # Block number -> position of its first access at or after start
+    first = {}
+    for i in range(len(addrs) - 1, start - 1, -1):
+        first[addrs[i] // block_size] = i
+    return first
+
+
+class OPTPolicy(ReplacementPolicy):
+    def __init__(self, num_sets, associativity, seed=0, future=None):
+        super().__init__(num_sets, associativity, seed)
+        if future is None:
+            raise ValueError("OPT replacement needs the trace's next-use index (see build_next_use).")
+        self.future = future
+        self.keys = {}          # set index -> {line number: next use}
+        self.heaps = {}         # set index -> [(-next use, line number)]
+
+    def insert(self, set_index, line_num, now):
+        position = now - 1
+        next_use = self.future[position] if 0 <= position < len(self.future) else NEVER
+        self._key(set_index, line_num, next_use)
+
+    # A hit re-keys the line with its block's next use after this access
+    touch = insert
+
+    def _key(self, set_index, line_num, next_use):
+        keys = self.keys.get(set_index)
+        if keys is None:
+            keys = self.keys[set_index] = {}
+            self.heaps[set_index] = []
+        keys[line_num] = next_use
+
+        heap = self.heaps[set_index]
+        heapq.heappush(heap, (-next_use, line_num))
+        if len(heap) > 4 * self.associativity + 16:
+            # Drop the stale entries
+            heap[:] = [(-key, line) for line, key in keys.items()]
+            heapq.heapify(heap)
+
+    def reindex(self, future, lines):
+        # Switches to another next-use index; lines: (set index, line
+        # number, next use) of every cached line under that index
+        self.future = future
+        self.keys = {}
+        self.heaps = {}
+        for set_index, line_num, next_use in lines:
+            self._key(set_index, line_num, next_use)
+
+    def evict(self, set_index):
+        keys = self.keys[set_index]
+        heap = self.heaps[set_index]
+        while True:
+            neg_next, line_num = heapq.heappop(heap)
+            if keys.get(line_num) == -neg_next:
+                del keys[line_num]
+                return line_num
+
+    def forget(self, set_index, line_num):
+        del self.keys[set_index][line_num]
+
+
+class DirectMappedPolicy:
+    # One line per set: the victim is always that line, whatever the
+    # configured policy, so there is nothing to track
+    def __init__(self, num_sets, associativity=1, seed=0):
+        self.num_sets = num_sets
+        self.associativity = 1
+
+    def victim(self, set_index):
+        return set_index
+
+    def insert(self, set_index, line_num, now):
+        pass
+
+    def touch(self, set_index, line_num, now):
+        pass
+
+    def remove(self, set_index, line_num):
+        pass
+
+
+POLICIES = {
+    "LRU": LRUPolicy,
+    "FIFO": FIFOPolicy,
+    "LFU": LFUPolicy,
+    "RAND": RandomPolicy,
+    "OPT": OPTPolicy,
+}
+
+
+def make_policy(name, num_sets, associativity, seed=0, future=None):
+    if name not in POLICIES:
+        raise ValueError(f"Unknown replacement policy: {name}")
+    if associativity == 1:
+        return DirectMappedPolicy(num_sets)
+    if name == "OPT":
+        return OPTPolicy(num_sets, associativity, seed, future)
+    return POLICIES[name](num_sets, associativity, seed)
@@ -0,0 +1,172 @@
+import csv, json, sys
+
+from util import print_stats
+
+# =========================================================
+# Reporting
+# Batch runs print nothing per access. What they do print is chosen
+# by a reporter:
+#   text - final stats through util.print_stats (the quiet default),
+#          plus one line per interval when an interval is set
+#   json - one JSON document with the interval list and final stats
+#   csv  - one row per interval, then a "final" row, streamed. Nested
+#          final stats (timing, prefetch, ...) are flattened into
+#          "section.name" columns, which must be declared up front
+#          (fields): a stat with no column is an error, never dropped.
+# With an interval of N accesses, the reporter cuts the cache's batches
+# at every N-th access and reports the hits, misses, hit ratio and
+# writebacks of that window alone.
+# The colored per-access view stays in simulator.run_demo, for small
+# demo sequences.
+# =========================================================
+
+CSV_FIELDS = ("kind", "start", "end", "hits", "misses", "hit_ratio", "writebacks")
+SECTOR_FIELDS = ("sector_size", "sector_misses", "bytes_read", "bytes_written")
+
+
+def cache_stats(cache):
+    # Final counters of a cache, plus sector traffic for a SectorCache
+    total = cache.hits + cache.misses
+    stats = {
+        "accesses": total,
+        "hits": cache.hits,
+        "misses": cache.misses,
+        "hit_ratio": round(cache.hits / total, 6) if total else 0,
+        "writebacks": cache.writebacks,
+    }
+    if hasattr(cache, "sector_size"):
+        stats.update((name, getattr(cache, name)) for name in SECTOR_FIELDS)
+    return stats
+
+
+def flatten(stats, prefix=""):
+    # {"timing": {"cycles": 5}} -> {"timing.cycles": 5}
+    flat = {}
+    for name, value in stats.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{name}."))
+        else:
+            flat[prefix + name] = value
+    return flat
+
+
+class Reporter:
+    def __init__(self, interval=0, fields=()):
+        if interval < 0:
+            raise ValueError("Report interval must be >= 0.")
+        self.interval = interval            # Accesses per window (0: final stats only)
+        self.fields = tuple(fields)         # Final-only stat names, flattened (csv columns)
+        self.cache = None
+
+    # ---------------- feeding the cache ----------------
+    def wrap(self, cache, position=0):
+        # Returns a drop-in for cache.access_many that closes a window
+        # every `interval` accesses. position: trace accesses already run.
+        self.cache = cache
+        self.position = position
+        self._open()
+        if not self.interval:
+            return cache.access_many
+
+        def access_many(ops, addrs, memory, values=None):
+            n = len(addrs)
+            i = 0
+            while i < n:
+                j = min(n, i + self.interval - (self.position - self.start))
+                cache.access_many(ops[i:j], addrs[i:j], memory,
+                                  values[i:j] if values is not None else None)
+                self.position += j - i
+                i = j
+                if self.position - self.start == self.interval:
+                    self._close()
+        return access_many
+
+    def _open(self):
+        self.start = self.position
+        self.hits = self.cache.hits
+        self.misses = self.cache.misses
+        self.writebacks = self.cache.writebacks
+
+    def _close(self):
+        hits = self.cache.hits - self.hits
+        misses = self.cache.misses - self.misses
+        total = hits + misses
+        self.window({
+            "start": self.start,
+            "end": self.position,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 6) if total else 0,
+            "writebacks": self.cache.writebacks - self.writebacks,
+        })
+        self._open()
+
+    def finish(self, stats):
+        # Reports the last (partial) window, then the final stats
+        if self.interval and self.cache is not None and self.position > self.start:
+            self._close()
+        self.final(stats)
+
+    # ---------------- output (subclasses) ----------------
+    def window(self, window):
+        raise NotImplementedError
+
+    def final(self, stats):
+        raise NotImplementedError
+
+
+class TextReporter(Reporter):
+    def window(self, window):
+        print(f"Accesses {window['start']}-{window['end']}: ", end="")
+        print_stats(window["hits"], window["misses"])
+        sys.stdout.flush()                  # Stream progress on long traces
+
+    def final(self, stats):
+        if self.interval:
+            print("Total: ", end="")
+        print_stats(stats["hits"], stats["misses"])
+
+
+class JSONReporter(Reporter):
+    def __init__(self, interval=0, fields=()):
+        super().__init__(interval, fields)
+        self.windows = []
+
+    def window(self, window):
+        self.windows.append(window)
+
+    def final(self, stats):
+        report = {"final": stats}
+        if self.interval:
+            report["interval"] = self.interval
+            report["intervals"] = self.windows
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+class CSVReporter(Reporter):
+    def __init__(self, interval=0, fields=()):
+        super().__init__(interval, fields)
+        self.writer = csv.DictWriter(sys.stdout, CSV_FIELDS + self.fields)
+        self.writer.writeheader()
+
+    def window(self, window):
+        self.writer.writerow(dict(window, kind="interval"))
+
+    def final(self, stats):
+        row = flatten(stats)
+        row.update(kind="final", start=0, end=row.pop("accesses"))
+        self.writer.writerow(row)
+
+
+REPORTERS = {
+    "text": TextReporter,
+    "json": JSONReporter,
+    "csv": CSVReporter,
+}
+
+
+def make_reporter(fmt="text", interval=0, fields=()):
+    if fmt not in REPORTERS:
+        raise ValueError(f"Unknown report format: {fmt}")
+    return REPORTERS[fmt](interval, fields)
@@ -0,0 +1,177 @@
+from array import array
+import itertools, math, random
+
+from cache import to_columns
+from trace_reader import BinaryTrace
+from util import print_stats
+
+# =========================================================
+# Sampled simulation
+# Estimates the hit ratio of a long trace while simulating only part
+# of it, and reports a 95% confidence interval for the estimate.
+#
+# Set sampling: a random subset of the cache's sets is simulated.
+#   Accesses that map to other sets are dropped before they reach the
+#   cache. Sets do not interact, so every sampled set behaves exactly
+#   as in a full run; the error comes only from which sets were picked.
+# Interval sampling: the trace is cut into periods of `period`
+#   accesses. In each one the first accesses are skipped (the cache is
+#   not touched), then `warmup` accesses are simulated to warm the
+#   cache without counting, then `measure` accesses are simulated and
+#   counted. Skipped accesses cost almost nothing, so the speedup is
+#   about period / (warmup + measure).
+#
+# Both treat each set / window as one sample of (hits, accesses) and
+# use the ratio estimator's standard error for the interval.
+# =========================================================
+
+Z_95 = 1.96
+BATCH_SIZE = 4096
+
+
+class SampleResult:
+    def __init__(self, samples, population, total, mode):
+        # samples: [(hits, accesses)] per sampled set or measured window
+        # population: number of sets / windows the samples were drawn from
+        self.mode = mode
+        self.samples = len(samples)
+        self.hits = sum(h for h, _ in samples)
+        self.accesses = sum(n for _, n in samples)
+        self.misses = self.accesses - self.hits
+        self.total = total                  # Accesses in the whole trace
+        self.ratio = self.hits / self.accesses if self.accesses else 0
+        self.half_width = _ratio_half_width(samples, self.ratio, population)
+
+    def stats(self):
+        # Final stats for a report.Reporter; an unbounded interval (a
+        # single sample) is reported as None
+        return {
+            "accesses": self.accesses,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.ratio, 6),
+            "sampling": self.mode,
+            "samples": self.samples,
+            "half_width": round(self.half_width, 6) if math.isfinite(self.half_width) else None,
+            "total": self.total,
+        }
+
+    def print_report(self):
+        print_stats(self.hits, self.misses)
+        print(f"{self.mode} sampling: hit ratio {self.ratio:.4f} ± {self.half_width:.4f} (95%), "
+              f"{self.samples} samples, simulated {self.accesses} of {self.total} accesses")
+
+
+def _ratio_half_width(samples, ratio, population):
+    # Standard error of a ratio estimate from a cluster sample, with the
+    # finite population correction
+    m = len(samples)
+    if m < 2:
+        return float("inf") if m else 0.0
+    mean_n = sum(n for _, n in samples) / m
+    if not mean_n:
+        return 0.0
+    spread = sum((h - ratio * n) ** 2 for h, n in samples) / (m - 1)
+    correction = 1 - m / population if population > m else 0
+    return Z_95 * math.sqrt(correction * spread / m) / mean_n
+
+
+def batches(trace):
+    # Streams (ops, addrs, values) column batches of up to BATCH_SIZE
+    # accesses: zero-copy slices of a BinaryTrace, or chunks read once
+    # from any iterable of access tuples (a text trace, stdin)
+    if isinstance(trace, BinaryTrace):
+        for start in range(0, len(trace), BATCH_SIZE):
+            end = start + BATCH_SIZE
+            yield trace.ops[start:end], trace.addrs[start:end], trace.values[start:end]
+        return
+
+    steps = iter(trace)
+    while True:
+        chunk = list(itertools.islice(steps, BATCH_SIZE))
+        if not chunk:
+            return
+        yield to_columns(chunk)
+
+
+def set_sample(cache, memory, trace, fraction, seed=0):
+    num_sets = cache.num_sets
+    mem_size = memory.size
+    block_size = cache.block_size
+
+    count = min(num_sets, max(1, round(fraction * num_sets)))
+    picked = random.Random(seed).sample(range(num_sets), count)
+    sampled = bytearray(num_sets)
+    for s in picked:
+        sampled[s] = 1
+
+    set_hits = array("Q", bytes(8 * num_sets))
+    set_accesses = array("Q", bytes(8 * num_sets))
+    total = 0
+
+    for ops, addrs, values in batches(trace):
+        total += len(addrs)
+        keep_ops, keep_addrs, keep_values, keep_sets = [], [], [], []
+        for op, address, value in zip(ops, addrs, values):
+            address %= mem_size
+            set_index = address // block_size % num_sets
+            if sampled[set_index]:
+                keep_ops.append(op)
+                keep_addrs.append(address)
+                keep_values.append(value)
+                keep_sets.append(set_index)
+
+        outcomes = cache.access_many(keep_ops, keep_addrs, memory, keep_values)
+        for set_index, outcome in zip(keep_sets, outcomes):
+            set_accesses[set_index] += 1
+            set_hits[set_index] += outcome & 1
+
+    samples = [(set_hits[s], set_accesses[s]) for s in picked]
+    return SampleResult(samples, num_sets, total, "Set")
+
+
+def interval_sample(cache, memory, trace, period, warmup, measure):
+    if measure < 1 or warmup < 0 or period < warmup + measure:
+        raise ValueError("Interval sampling needs period >= warmup + measure and measure >= 1.")
+
+    mem_size = memory.size
+    skip = period - warmup - measure            # Accesses dropped at the start of each period
+    total = 0
+    samples = []
+    window = None                               # (hits, misses) when the open window started
+
+    def run(ops, addrs, values, i, j):
+        cache.access_many(ops[i:j], [a % mem_size for a in addrs[i:j]], memory, values[i:j])
+
+    for ops, addrs, values in batches(trace):
+        n = len(addrs)
+        i = 0
+        while i < n:
+            phase = (total + i) % period
+            if phase < skip:
+                i = min(n, i + skip - phase)
+            elif phase < skip + warmup:
+                j = min(n, i + skip + warmup - phase)
+                run(ops, addrs, values, i, j)
+                i = j
+            else:
+                if window is None:
+                    window = (cache.hits, cache.misses)
+                j = min(n, i + period - phase)
+                run(ops, addrs, values, i, j)
+                i = j
+                if (total + j) % period == 0:
+                    samples.append(_window_sample(cache, window))
+                    window = None
+        total += n
+
+    if window is not None:
+        samples.append(_window_sample(cache, window))     # Trace ended mid-window
+
+    # Population: every window of `measure` accesses the trace could be cut into
+    return SampleResult(samples, max(1, math.ceil(total / measure)), total, "Interval")
+
+
+def _window_sample(cache, window):
+    hits = cache.hits - window[0]
+    return hits, hits + cache.misses - window[1]
@@ -0,0 +1,271 @@
+import sys
+
+from cache import Cache
+from mainMem import Memory
+from trace_reader import read_trace
+from util import get_associativity
+from workloads import make_workload
+
+# =========================================================
+# Sector (sub-block) caches
+# A block is split into sectors of sector_size bytes. Each line keeps
+# a valid bit and a dirty bit per sector (store.get_sectors /
+# set_sectors), so:
+#   - a miss fetches only the sectors the access touches; the rest of
+#     the block stays invalid until it is used
+#   - a hit on the block whose sector is not valid yet is a "sector
+#     miss": the sector is fetched into the line already holding the tag
+#   - a write that covers whole sectors does not fetch them at all
+#     (with sector_size = 1 every byte store is such a write, and the
+#     dirty mask is per byte)
+#   - a writeback writes only the dirty sectors
+# Bytes moved to and from memory are counted, so different sector
+# sizes can be compared; sector_size == block_size behaves exactly like
+# Cache (same hits, misses and writebacks) and gives the whole-block
+# baseline.
+#
+# Sector misses count as misses (they go to memory). Compact storage
+# keeps the masks in 64-bit arrays: at most 64 sectors per block.
+# A SectorCache is meant to sit directly in front of memory: hooks
+# (on_evict) see invalid sectors as zeros, and it cannot be checkpointed.
+# =========================================================
+
+class SectorCache(Cache):
+    def __init__(self, cache_size, block_size, associativity, replacement_policy, write_policy,
+                 sector_size, seed=0, storage="objects", future=None):
+        if sector_size < 1 or block_size % sector_size:
+            raise ValueError("Sector size must divide the block size.")
+        if storage == "compact" and block_size // sector_size > 64:
+            raise ValueError("Compact storage supports at most 64 sectors per block.")
+
+        # The specialized fast paths know nothing about sectors
+        super().__init__(cache_size, block_size, associativity, replacement_policy, write_policy,
+                         seed=seed, storage=storage, specialize=False, future=future)
+
+        self.sector_size = sector_size
+        self.sectors = block_size // sector_size        # Sectors per block
+        self.full_mask = (1 << self.sectors) - 1
+        self.empty_block = bytes(block_size)            # Contents of a line with no valid sector
+
+        self.sector_misses = 0          # Misses on a block that was present
+        self.bytes_read = 0             # Bytes fetched from memory
+        self.bytes_written = 0          # Bytes written to memory (writebacks and write-through)
+
+    def _mask(self, offset, size):
+        # Sectors overlapping bytes [offset, offset + size)
+        first = offset // self.sector_size
+        last = (offset + size - 1) // self.sector_size
+        return ((1 << (last + 1)) - 1) ^ ((1 << first) - 1)
+
+    def _covered(self, offset, size):
+        # Sectors lying entirely inside bytes [offset, offset + size)
+        first = -(-offset // self.sector_size)
+        end = (offset + size) // self.sector_size
+        if end <= first:
+            return 0
+        return ((1 << end) - 1) ^ ((1 << first) - 1)
+
+    def _access(self, block_num, tag, set_index, offset, size, memory, overwrite):
+        # Makes bytes [offset, offset + size) of the block usable and
+        # counts the access as a hit, sector miss or miss. overwrite: the
+        # caller stores every byte of the range, so sectors it covers
+        # entirely are not fetched. Returns the line number.
+        mask = self._mask(offset, size)
+        line_num = self.tag_index[set_index].get(tag)
+        if line_num is not None:
+            valid, dirty = self.store.get_sectors(line_num)
+        else:
+            valid = dirty = 0
+
+        fetch = mask & ~valid
+        if overwrite:
+            fetch &= ~self._covered(offset, size)
+
+        # Fetch the missing sectors before choosing a victim
+        fetched = []
+        ss = self.sector_size
+        base = block_num * self.sectors
+        pending = fetch
+        while pending:
+            low = pending & -pending
+            sector = low.bit_length() - 1
+            fetched.append((sector, memory.read_block(base + sector, ss)))
+            self.bytes_read += ss
+            pending ^= low
+
+        if line_num is not None:
+            if fetch:
+                self.misses += 1
+                self.sector_misses += 1
+            else:
+                self.hits += 1
+            self.store.touch(line_num, self.clock)
+            self.policy.touch(set_index, line_num, self.clock)
+        else:
+            self.misses += 1
+            line_num = self.choose_victim(set_index)
+            if self.store.is_dirty(line_num) and self.write_policy == "WB":
+                self.write_back(set_index, line_num, memory)
+            self.fill_line(set_index, line_num, tag, self.empty_block, valid=0)
+
+        for sector, data in fetched:
+            self.store.write_bytes(line_num, sector * ss, data)
+        self.store.set_sectors(line_num, valid | mask, dirty)
+        return line_num
+
+    #  CACHE READ OPERATION
+    def read_decoded(self, block_num, tag, set_index, offset, memory):
+        self.clock += 1
+        line_num = self._access(block_num, tag, set_index, offset, 1, memory, False)
+        return self.store.read_byte(line_num, offset)
+
+    #  CACHE WRITE OPERATION
+    def write_decoded(self, address, value, block_num, tag, set_index, offset, memory):
+        self.clock += 1
+        value &= 0xFF
+
+        if self.write_policy == "WA":
+            # Write-around: update the cached copy only if its sector is
+            # valid; memory is always written, nothing is allocated
+            line_num = self.tag_index[set_index].get(tag)
+            bit = 1 << (offset // self.sector_size)
+            if line_num is not None and self.store.get_sectors(line_num)[0] & bit:
+                self.hits += 1
+                self.store.write_byte(line_num, offset, value)
+                self.store.touch(line_num, self.clock)
+                self.policy.touch(set_index, line_num, self.clock)
+            else:
+                self.misses += 1
+                if line_num is not None:
+                    self.sector_misses += 1
+            memory.write_byte(address, value)
+            self.bytes_written += 1
+            return
+
+        line_num = self._access(block_num, tag, set_index, offset, 1, memory, True)
+        self.store.write_byte(line_num, offset, value)
+        if self.write_policy == "WT":
+            memory.write_byte(address, value)
+            self.bytes_written += 1
+        else:
+            self._mark_dirty(line_num, self._mask(offset, 1))
+
+    def _mark_dirty(self, line_num, mask):
+        valid, dirty = self.store.get_sectors(line_num)
+        self.store.set_sectors(line_num, valid, dirty | mask)
+        self.store.mark_dirty(line_num)
+
+    #  WRITE THE DIRTY SECTORS BACK TO MEMORY
+    def write_back(self, set_index, line_num, memory):
+        block_num = self.store.get_tag(line_num) * self.num_sets + set_index
+        valid, dirty = self.store.get_sectors(line_num)
+        if not dirty:
+            dirty = valid       # Dirtied through install_block: no per-sector record
+
+        ss = self.sector_size
+        base = block_num * self.sectors
+        data = self.store.block_data(line_num)
+        while dirty:
+            low = dirty & -dirty
+            sector = low.bit_length() - 1
+            memory.write_block(base + sector, data[sector * ss:(sector + 1) * ss])
+            self.bytes_written += ss
+            dirty ^= low
+
+        self.store.set_sectors(line_num, valid, 0)
+        self.writebacks += 1
+
+    #  BLOCK FILL
+    def fill_line(self, set_index, line_num, tag, block_data, valid=None):
+        # valid: sector mask of the new contents (default: the whole block)
+        super().fill_line(set_index, line_num, tag, block_data)
+        self.store.set_sectors(line_num, self.full_mask if valid is None else valid, 0)
+
+    def allocate(self, block_num, memory, block_data=None):
+        if block_data is None:
+            block_data = memory.read_block(block_num, self.block_size)
+            self.bytes_read += self.block_size
+        return super().allocate(block_num, memory, block_data)
+
+    #  BLOCK-LEVEL INTERFACE
+    def read_block(self, address, size, memory):
+        self.clock += 1
+        block_num = address // self.block_size
+        offset = address % self.block_size
+        line_num = self._access(block_num, block_num // self.num_sets, block_num % self.num_sets,
+                                offset, size, memory, False)
+        return self.store.copy_bytes(line_num, offset, size)
+
+    def write_block(self, address, block_data, memory):
+        self.clock += 1
+        block_num = address // self.block_size
+        tag = block_num // self.num_sets
+        set_index = block_num % self.num_sets
+        offset = address % self.block_size
+        size = len(block_data)
+        mask = self._mask(offset, size)
+
+        if self.write_policy == "WA":
+            line_num = self.tag_index[set_index].get(tag)
+            if line_num is not None and self.store.get_sectors(line_num)[0] & mask == mask:
+                self.hits += 1
+                self.store.write_bytes(line_num, offset, block_data)
+                self.store.touch(line_num, self.clock)
+                self.policy.touch(set_index, line_num, self.clock)
+            else:
+                self.misses += 1
+                if line_num is not None:
+                    self.sector_misses += 1
+            memory.write_block(address // size, block_data)
+            self.bytes_written += size
+            return
+
+        line_num = self._access(block_num, tag, set_index, offset, size, memory, True)
+        self.store.write_bytes(line_num, offset, block_data)
+        if self.write_policy == "WB":
+            self._mark_dirty(line_num, mask)
+        else:
+            memory.write_block(address // size, block_data)
+            self.bytes_written += size
+
+    # ---------------- reporting ----------------
+    def print_report(self):
+        print(f"Memory traffic: {self.bytes_read} bytes read, {self.bytes_written} bytes written "
+              f"({self.sector_size}-byte sectors, {self.sector_misses} sector misses, "
+              f"{self.writebacks} writebacks)")
+
+
+def compare_sectors(mem_size, cache_size, block_size, mapping, replacement, write, sequence):
+    # Replays the sequence once per sector size, from whole blocks down
+    # to single bytes, and prints the traffic of each
+    sequence = list(sequence)
+    print(f"{'sector':>6} {'hits':>9} {'misses':>9} {'bytes read':>12} {'bytes written':>14} {'total':>12}")
+    sector_size = block_size
+    while sector_size >= 1:
+        cache = SectorCache(cache_size, block_size,
+                            associativity=get_associativity(mapping, cache_size // block_size),
+                            replacement_policy=replacement, write_policy=write,
+                            sector_size=sector_size, seed=0)
+        memory = Memory(mem_size)
+        cache.access_sequence([step[:1] + (step[1] % mem_size,) + step[2:] for step in sequence], memory)
+        if write == "WB":
+            # Count the dirty data still cached, as a final flush would
+            for set_index in range(cache.num_sets):
+                for line_num in cache.tag_index[set_index].values():
+                    if cache.store.is_dirty(line_num):
+                        cache.write_back(set_index, line_num, memory)
+        print(f"{sector_size:>6} {cache.hits:>9} {cache.misses:>9} {cache.bytes_read:>12,} "
+              f"{cache.bytes_written:>14,} {cache.bytes_read + cache.bytes_written:>12,}")
+        sector_size //= 2
+
+
+if __name__ == "__main__":
+    # python sector.py MEM_EXP CACHE_EXP BLOCK_EXP MAP_POLICY REPL_POLICY WRITE_POLICY TRACE
+    # With no arguments, compares sector sizes on a write-heavy zipf workload
+    if len(sys.argv) == 8:
+        mem_exp, cache_exp, block_exp, mapping, replacement, write, path = sys.argv[1:]
+        compare_sectors(2 ** int(mem_exp), 2 ** int(cache_exp), 2 ** int(block_exp),
+                        mapping.lower(), replacement.upper(), write.upper(), read_trace(path))
+    else:
+        compare_sectors(1 << 16, 1 << 12, 64, "set:4", "LRU", "WB",
+                        make_workload("zipf", 100_000, 1 << 16, write_ratio=0.3, seed=0))
@@ -1,60 +1,53 @@
 from cache import Cache
-from mainMem import Memory
+from sector import SectorCache
+from mainMem import Memory, make_memory
 from custom_config import get_custom_configuration
-
-# =========================================================
-# ANSI COLOR CODES
-# This is used to color terminal output for better readability
-# =========================================================
-RED     = "\033[91m"
-GREEN   = "\033[92m"
-YELLOW  = "\033[93m"
-CYAN    = "\033[96m"
-BOLD    = "\033[1m"
-RESET   = "\033[0m" # this makes the terminal colors normal again
-
-# =========================================================
-# Predefined Test Sequence (Used by all demos)
-# =========================================================
-TEST_SEQUENCE = [
-    ("read", 10),
-    ("read", 14),
-    ("read", 10),
-    ("write", 18, 7),
-    ("read", 18),
-    ("read", 50),
-    ("read", 58),
-    ("write", 90, 33),
-    ("read", 90),
-    ("read", 10),
-]
+from trace_reader import read_trace, is_binary_trace, BinaryTrace
+from prefetch import make_prefetcher
+from writebuffer import WriteBuffer
+from timing import TimingModel
+from report import make_reporter, cache_stats, flatten, SECTOR_FIELDS
+from instrument import Instrumentation
+from sampling import set_sample, interval_sample
+from checkpoint import check_checkpointable, save_checkpoint, load_checkpoint, resume_opt
+from replacement import build_next_use
+from util import parse_args, print_stats, get_associativity
+from demo import TEST_SEQUENCE, BOLD, CYAN, GREEN, RED, YELLOW, RESET
+import itertools, sys
 
 # =========================================================
 # Helper: Run a single demonstration with given parameters
 # =========================================================
-def run_demo(name, mem_size, cache_size, block_size, mapping, replacement, write, sequence=None):
-    print(f"\n{BOLD}=== Running Demo: {name} ==={RESET}")
-    print(f"{CYAN}Configuration:{RESET}")
-    print(f"  Memory size:   {mem_size}")
-    print(f"  Cache size:    {cache_size}")
-    print(f"  Block size:    {block_size}")
-    print(f"  Mapping:       {mapping}")
-    print(f"  Replacement:   {replacement}")
-    print(f"  Write policy:  {write}")
-    print(f"{BOLD}==========================================\n")
+def run_demo(name, mem_size, cache_size, block_size, mapping, replacement, write, sequence=None,
+             report="verbose"):
+    # report: "verbose" prints a colored line per access (small demos),
+    # "quiet" only the final stats
+    if report not in ("verbose", "quiet"):
+        raise ValueError(f"Unknown demo report mode: {report}")
+
+    if report == "verbose":
+        print(f"\n{BOLD}=== Running Demo: {name} ==={RESET}")
+        print(f"{CYAN}Configuration:{RESET}")
+        print(f"  Memory size:   {mem_size}")
+        print(f"  Cache size:    {cache_size}")
+        print(f"  Block size:    {block_size}")
+        print(f"  Mapping:       {mapping}")
+        print(f"  Replacement:   {replacement}")
+        print(f"  Write policy:  {write}")
+        print(f"{BOLD}==========================================\n")
 
     memory = Memory(mem_size)
     num_lines = cache_size // block_size
 
     # Determine associativity based on mapping
-    if mapping == "direct":
-        associativity = 1
-    elif mapping == "full":
-        associativity = num_lines
-    elif mapping.startswith("set:"):
-        associativity = int(mapping.split(":")[1])
-    else:
-        raise ValueError("Invalid mapping policy.")
+    associativity = get_associativity(mapping, num_lines)
+
+    steps = sequence if sequence else TEST_SEQUENCE
+
+    # OPT looks ahead: give it the sequence's next-use index
+    future = None
+    if replacement == "OPT":
+        future = build_next_use([step[1] for step in steps], block_size)
 
     # Create cache instance
     cache = Cache(
@@ -63,10 +56,16 @@ def run_demo(name, mem_size, cache_size, block_size, mapping, replacement, write
         associativity=associativity,
         replacement_policy=replacement,
         write_policy=write,
+        future=future,
     )
 
+    if report == "quiet":
+        # Final stats only: the whole sequence runs as one batch
+        cache.access_sequence(steps, memory)
+        print_stats(cache.hits, cache.misses)
+        return
+
     # Execute test sequence
-    steps = sequence if sequence else TEST_SEQUENCE
     for step in steps:
         op = step[0]
 
@@ -115,6 +114,211 @@ def run_demo(name, mem_size, cache_size, block_size, mapping, replacement, write
     print("=====================\n")
 
 
+# =========================================================
+# Batch Mode: stream a trace straight into the cache
+# =========================================================
+BATCH_SIZE = 4096       # Accesses handed to Cache.access_many at a time
+
+def run_trace(mem_size, cache_size, block_size, mapping, replacement, write, trace,
+              storage="objects", memory_backend="list", prefetcher=None,
+              write_buffer=None, instrumentation=None, resume=None, save_path=None,
+              sector_size=None, timing=None, reporter=None, seed=0):
+    # Same setup as run_demo, but with no per-access printing so the
+    # trace (any iterable of access tuples, usually a generator, or a
+    # memory-mapped BinaryTrace) is consumed with constant memory.
+    # resume: a checkpoint.Checkpoint whose cache and memory carry on,
+    # skipping the trace accesses it already ran
+    # sector_size: build a SectorCache (see sector.py) instead of a Cache
+    # timing: a timing.TimingModel placed between the cache and memory
+    # reporter: a report.Reporter that sees every access (interval windows)
+    folded = None
+    if replacement == "OPT":
+        # OPT needs the whole trace up front for its next-use index
+        if isinstance(trace, BinaryTrace):
+            folded = [a % mem_size for a in trace.addrs]
+        else:
+            trace = list(trace)
+            folded = [step[1] % mem_size for step in trace]
+
+    if resume is not None:
+        cache, memory, skip = resume.cache, resume.memory, resume.position
+        if folded is not None:
+            resume_opt(cache, folded, skip)
+    else:
+        future = None
+        if folded is not None:
+            future = build_next_use(folded, block_size)
+
+        memory = make_memory(mem_size, memory_backend)
+        associativity = get_associativity(mapping, cache_size // block_size)
+        if sector_size:
+            cache = SectorCache(cache_size, block_size, associativity, replacement, write,
+                                sector_size, seed=seed, storage=storage, future=future)
+        else:
+            cache = Cache(
+                cache_size,
+                block_size,
+                associativity=associativity,
+                replacement_policy=replacement,
+                write_policy=write,
+                seed=seed,
+                storage=storage,
+                future=future,
+            )
+        skip = 0
+    if save_path is not None:
+        check_checkpointable(cache)     # Fail now, not after the whole replay
+
+    backing = memory
+    if write_buffer is not None:
+        # The cache writes into the buffer, the buffer into memory
+        write_buffer.memory = memory
+        memory = write_buffer
+    if timing is not None:
+        # Directly behind the cache: it times the cache's own requests
+        timing.memory = memory
+        memory = timing
+    if prefetcher is not None:
+        prefetcher.attach(cache)
+    if instrumentation is not None:
+        instrumentation.attach(cache)
+    if timing is not None:
+        timing.attach(cache)
+
+    access_many = cache.access_many if reporter is None else reporter.wrap(cache, skip)
+
+    if isinstance(trace, BinaryTrace):
+        # Columns are already typed arrays: ops and values go out as
+        # zero-copy slices. Addresses are folded into memory (one list
+        # per batch) unless memory spans all 64-bit addresses, in which
+        # case their slices go out unchanged as well.
+        fold = mem_size < 1 << 64
+        for start in range(skip, len(trace), BATCH_SIZE):
+            end = start + BATCH_SIZE
+            addrs = trace.addrs[start:end]
+            if fold:
+                addrs = [a % mem_size for a in addrs]
+            access_many(trace.ops[start:end], addrs, memory, trace.values[start:end])
+    else:
+        # Feed the cache in fixed-size batches: memory stays bounded and the
+        # per-access work happens inside Cache.access_many
+        ops, addrs, values = [], [], []
+        for step in itertools.islice(trace, skip, None):
+            ops.append(step[0] == "write")
+            addrs.append(step[1] % mem_size)      # Fold wide trace addresses into memory
+            values.append(step[2] if len(step) > 2 else 0)
+
+            if len(ops) == BATCH_SIZE:
+                access_many(ops, addrs, memory, values)
+                ops, addrs, values = [], [], []
+
+        access_many(ops, addrs, memory, values)
+
+    if write_buffer is not None:
+        write_buffer.flush()
+    if save_path is not None:
+        save_checkpoint(save_path, cache, backing)
+    return cache
+
+
+def run_sampled(args, trace):
+    # Batch mode with --sample-sets / --sample-interval (see sampling.py)
+    memory = make_memory(args.mem_size, args.memory)
+    cache = Cache(
+        args.cache_size,
+        args.block_size,
+        associativity=get_associativity(args.mapping, args.cache_size // args.block_size),
+        replacement_policy=args.replacement,
+        write_policy=args.write,
+        seed=args.seed,
+        storage=args.storage,
+    )
+    if args.sample_sets:
+        return set_sample(cache, memory, trace, args.sample_sets)
+    return interval_sample(cache, memory, trace, *args.sample_interval)
+
+
+def batch_main(argv=None):
+    # Non-interactive entry point: command line -> final stats
+    args = parse_args(argv)
+    if args.trace != "-" and (args.format == "binary" or
+                              (args.format == "auto" and is_binary_trace(args.trace))):
+        trace = BinaryTrace(args.trace)
+    else:
+        trace = read_trace(args.trace, args.format, args.ifetch)
+    if args.sample_sets or args.sample_interval:
+        result = run_sampled(args, trace)
+        if args.output_format == "text":
+            result.print_report()
+        else:
+            stats = result.stats()
+            fields = [name for name in stats if name not in ("accesses", "hits", "misses", "hit_ratio")]
+            make_reporter(args.output_format, fields=fields).finish(stats)
+        return
+
+    prefetcher = None
+    if args.prefetch != "none":
+        prefetcher = make_prefetcher(args.prefetch, args.prefetch_degree, args.prefetch_latency)
+    write_buffer = None
+    if args.write_buffer:
+        write_buffer = WriteBuffer(args.write_buffer, args.block_size)
+    instrumentation = Instrumentation() if args.classify else None
+    timing = None
+    if args.mshrs:
+        timing = TimingModel(args.mshrs, args.mem_latency, args.mem_bandwidth)
+
+    # Add-on stats, reported as nested sections of the final stats
+    sections = {}
+    if prefetcher is not None:
+        sections["prefetch"] = prefetcher.stats
+    if write_buffer is not None:
+        sections["write_buffer"] = write_buffer.stats
+    if instrumentation is not None:
+        sections["classify"] = instrumentation.stats
+    if timing is not None:
+        sections["timing"] = timing.summary
+    fields = list(SECTOR_FIELDS) if args.sector_size else []
+    fields += flatten({name: section() for name, section in sections.items()})
+    reporter = make_reporter(args.output_format, args.report_interval, fields)
+
+    cache = run_trace(
+        args.mem_size,
+        args.cache_size,
+        args.block_size,
+        args.mapping,
+        args.replacement,
+        args.write,
+        trace,
+        storage=args.storage,
+        memory_backend=args.memory,
+        prefetcher=prefetcher,
+        write_buffer=write_buffer,
+        instrumentation=instrumentation,
+        resume=load_checkpoint(args.resume) if args.resume else None,
+        save_path=args.save_checkpoint,
+        sector_size=args.sector_size,
+        timing=timing,
+        reporter=reporter,
+        seed=args.seed,
+    )
+    stats = cache_stats(cache)
+    stats.update((name, section()) for name, section in sections.items())
+    reporter.finish(stats)
+    if args.output_format != "text":
+        return      # Keep structured output parseable: no add-on text reports
+
+    if args.sector_size:
+        cache.print_report()
+    if prefetcher is not None:
+        prefetcher.print_report()
+    if write_buffer is not None:
+        write_buffer.print_report()
+    if instrumentation is not None:
+        instrumentation.print_report()
+    if timing is not None:
+        timing.print_report()
+
+
 # =========================================================
 # Menu-Driven Main Program
 # =========================================================
@@ -200,4 +404,7 @@ def main():
 
 # Entry Point
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1:
+        batch_main()
+    else:
+        main()
@@ -0,0 +1,185 @@
+from bisect import bisect_left
+import sys
+
+# =========================================================
+# Mattson stack-distance (reuse-distance) analysis
+# One pass over a trace gives the LRU miss ratio for EVERY cache
+# size at a fixed block size. An access hits in an LRU set with A
+# ways exactly when fewer than A distinct blocks of the same set
+# were touched since that block's previous access (its stack
+# distance). Distances are counted with a Fenwick tree over access
+# times, so each access costs O(log n).
+#
+# Assumes every access allocates (WB / WT). Write-around misses do
+# not fill the cache and are not modelled here.
+# =========================================================
+
+class FenwickTree:
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, index, delta):
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index):
+        # Sum of positions [0, index)
+        total = 0
+        i = index
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    @classmethod
+    def ones(cls, count, size):
+        # Tree with positions [0, count) set to 1, built in O(size)
+        tree = cls(size)
+        for i in range(1, size + 1):
+            if i <= count:
+                tree.tree[i] += 1
+            parent = i + (i & -i)
+            if parent <= size:
+                tree.tree[parent] += tree.tree[i]
+        return tree
+
+
+class _SetStack:
+    # LRU stack of one set: last access time of each block, and a
+    # Fenwick tree marking the times that are still "most recent"
+    def __init__(self, capacity):
+        self.clock = 0
+        self.last = {}                  # block -> time of its latest access
+        self.marks = FenwickTree(capacity)
+
+    def access(self, block):
+        # Returns the stack distance, or None for a first reference
+        prev = self.last.get(block)
+        distance = None
+
+        if prev is not None:
+            # Distinct blocks touched after prev = live marks after prev
+            distance = len(self.last) - self.marks.prefix_sum(prev + 1)
+            self.marks.add(prev, -1)
+            del self.last[block]
+
+        if self.clock == self.marks.size:
+            self.compact()
+
+        self.marks.add(self.clock, 1)
+        self.last[block] = self.clock
+        self.clock += 1
+        return distance
+
+    def compact(self):
+        # Renumber live times 0..k-1 (order preserved) so the tree only
+        # ever holds O(distinct blocks) positions, however long the trace
+        live = sorted(self.last, key=self.last.get)
+        for position, block in enumerate(live):
+            self.last[block] = position
+
+        # Leave room for at least as many new accesses as live blocks
+        size = max(self.marks.size, 2 * len(live) + 1)
+        self.marks = FenwickTree.ones(len(live), size)
+        self.clock = len(live)
+
+
+class StackDistanceAnalyzer:
+    def __init__(self, block_size, num_sets=1, initial_capacity=64):
+        self.block_size = block_size
+        self.num_sets = num_sets                # 1 = fully associative
+        self.initial_capacity = initial_capacity
+
+        self.stacks = {}                        # set index -> _SetStack (created lazily)
+        self.histogram = {}                     # stack distance -> access count
+        self.cold_misses = 0
+        self.accesses = 0
+
+    def access(self, address):
+        block = address // self.block_size
+        set_index = block % self.num_sets
+
+        stack = self.stacks.get(set_index)
+        if stack is None:
+            stack = self.stacks[set_index] = _SetStack(self.initial_capacity)
+
+        self.accesses += 1
+        distance = stack.access(block)
+        if distance is None:
+            self.cold_misses += 1
+        else:
+            self.histogram[distance] = self.histogram.get(distance, 0) + 1
+
+    def run(self, sequence):
+        # Consumes the same ("read", addr) / ("write", addr, value) tuples as Cache
+        for step in sequence:
+            self.access(step[1])
+        return self
+
+    def misses_for_ways(self, ways):
+        # LRU misses in a cache with `ways` lines per set
+        return self.cold_misses + sum(
+            count for distance, count in self.histogram.items() if distance >= ways
+        )
+
+    def miss_ratio_curve(self, cache_sizes=None):
+        # Returns [(cache_size_bytes, miss_ratio), ...]. Without explicit
+        # sizes, every power-of-two associativity up to the largest
+        # observed reuse distance is reported.
+        lines_per_way = self.num_sets * self.block_size
+
+        if cache_sizes is None:
+            largest = max(self.histogram, default=0) + 1
+            cache_sizes = []
+            ways = 1
+            while True:
+                cache_sizes.append(ways * lines_per_way)
+                if ways >= largest:
+                    break
+                ways *= 2
+
+        # Accesses with distance >= w, for every distance, via one sorted sweep
+        distances = sorted(self.histogram)
+        at_least = {}
+        running = 0
+        for distance in reversed(distances):
+            running += self.histogram[distance]
+            at_least[distance] = running
+
+        curve = []
+        for size in cache_sizes:
+            ways = size // lines_per_way
+            # First observed distance >= ways
+            misses = self.cold_misses
+            i = bisect_left(distances, ways)
+            if i < len(distances):
+                misses += at_least[distances[i]]
+            ratio = misses / self.accesses if self.accesses else 0
+            curve.append((size, ratio))
+        return curve
+
+
+def main(argv=None):
+    from trace_reader import read_trace
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
+        print("Usage: stack_distance.py TRACE BLOCK_EXP [SETS]")
+        sys.exit(1)
+
+    block_size = 2 ** int(argv[1])
+    num_sets = int(argv[2]) if len(argv) > 2 else 1
+
+    analyzer = StackDistanceAnalyzer(block_size, num_sets).run(read_trace(argv[0]))
+
+    print(f"Accesses: {analyzer.accesses}, cold misses: {analyzer.cold_misses}")
+    print(f"{'cache size':>12}  {'miss ratio':>10}")
+    for size, ratio in analyzer.miss_ratio_curve():
+        print(f"{size:>12}  {ratio:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+from array import array
+from multiprocessing import Pool, shared_memory
+import argparse, csv, itertools, json, os, sys, time
+
+from cache import Cache
+from mainMem import make_memory
+from replacement import build_next_use
+from trace_reader import read_trace, TRACE_FORMATS
+from util import get_associativity
+
+# =========================================================
+# Design-space sweep
+# Runs every combination of cache size x block size x mapping x
+# replacement x write policy over ONE trace, spread across a process
+# pool. The trace is decoded once into a shared memory buffer:
+#   [ n addresses (uint64) | n ops (uint8, 1 = write) | n values (uint8) ]
+# and every worker reads it in place, so nothing is re-parsed or pickled.
+# =========================================================
+
+RESULT_FIELDS = [
+    "cache_size", "block_size", "mapping", "replacement", "write",
+    "hits", "misses", "hit_ratio", "writebacks", "seconds",
+]
+
+
+class SharedTrace:
+    # Owner side: packs a trace into a SharedMemory segment.
+    # Addresses are folded into the simulated memory size up front.
+    def __init__(self, sequence, mem_size):
+        addrs = array("Q")
+        ops = bytearray()
+        values = bytearray()
+
+        for step in sequence:
+            addrs.append(step[1] % mem_size)
+            if step[0] == "write":
+                ops.append(1)
+                values.append(step[2] & 0xFF)
+            else:
+                ops.append(0)
+                values.append(0)
+
+        self.length = len(ops)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, self.length * 10))
+        buf = self.shm.buf
+        buf[:self.length * 8] = addrs.tobytes()
+        buf[self.length * 8:self.length * 9] = ops
+        buf[self.length * 9:self.length * 10] = values
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach_trace(name, length):
+    # Worker side: returns zero-copy (addrs, ops, values) views.
+    # Pool workers share the owner's resource tracker, so attaching here
+    # does not register a second owner; only SharedTrace.close unlinks.
+    shm = shared_memory.SharedMemory(name=name)
+    buf = shm.buf
+    addrs = buf[:length * 8].cast("Q")
+    ops = buf[length * 8:length * 9]
+    values = buf[length * 9:length * 10]
+    return shm, addrs, ops, values
+
+
+# Per-worker state, set once by the pool initializer
+_worker = {}
+
+
+def _init_worker(name, length, mem_size, memory_backend):
+    shm, addrs, ops, values = attach_trace(name, length)
+    _worker.update(shm=shm, addrs=addrs, ops=ops, values=values,
+                   mem_size=mem_size, memory_backend=memory_backend)
+
+
+def run_config(config):
+    # Replays the shared trace through one configuration
+    cache_size, block_size, mapping, replacement, write = config
+    mem_size = _worker["mem_size"]
+    addrs, ops, values = _worker["addrs"], _worker["ops"], _worker["values"]
+
+    memory = make_memory(mem_size, _worker["memory_backend"])
+    cache = Cache(
+        cache_size,
+        block_size,
+        associativity=get_associativity(mapping, cache_size // block_size),
+        replacement_policy=replacement,
+        write_policy=write,
+        seed=0,
+        future=build_next_use(addrs, block_size) if replacement == "OPT" else None,
+    )
+
+    start = time.perf_counter()
+    cache.access_many(ops, addrs, memory, values)
+    seconds = time.perf_counter() - start
+
+    total = cache.hits + cache.misses
+    return {
+        "cache_size": cache_size,
+        "block_size": block_size,
+        "mapping": mapping,
+        "replacement": replacement,
+        "write": write,
+        "hits": cache.hits,
+        "misses": cache.misses,
+        "hit_ratio": cache.hits / total if total else 0,
+        "writebacks": cache.writebacks,
+        "seconds": round(seconds, 6),
+    }
+
+
+def valid_config(cache_size, block_size, mapping):
+    # Same geometry rules custom_config enforces interactively;
+    # get_associativity rejects a set:N whose N does not divide the lines
+    if block_size > cache_size or cache_size % block_size:
+        return False
+    num_lines = cache_size // block_size
+    try:
+        associativity = get_associativity(mapping, num_lines)
+    except ValueError:
+        return False
+    return 0 < associativity <= num_lines and num_lines % associativity == 0
+
+
+def build_configs(cache_sizes, block_sizes, mappings, replacements, writes):
+    return [
+        config
+        for config in itertools.product(cache_sizes, block_sizes, mappings, replacements, writes)
+        if valid_config(*config[:3])
+    ]
+
+
+def sweep(sequence, configs, mem_size, jobs=None, memory_backend="auto"):
+    # Returns one result dict per configuration, in configuration order
+    trace = SharedTrace(sequence, mem_size)
+    try:
+        with Pool(jobs or os.cpu_count(), initializer=_init_worker,
+                  initargs=(trace.name, trace.length, mem_size, memory_backend)) as pool:
+            return pool.map(run_config, configs, chunksize=1)
+    finally:
+        trace.close()
+
+
+def write_results(results, csv_path=None, json_path=None):
+    if csv_path:
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def parse_sweep_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="sweep.py",
+        description="Sweep cache configurations over one trace. All EXP are 2^X.",
+    )
+    parser.add_argument("trace", metavar="TRACE", help="trace file, '-' reads stdin")
+    parser.add_argument("mem_exp", metavar="MEM_EXP", type=int)
+    parser.add_argument("--cache-exp", type=int, nargs="+", default=[10])
+    parser.add_argument("--block-exp", type=int, nargs="+", default=[4])
+    parser.add_argument("--mapping", type=str.lower, nargs="+", default=["direct"])
+    parser.add_argument("--replacement", type=str.upper, nargs="+", default=["LRU"],
+                        choices=("RAND", "LRU", "FIFO", "LFU", "OPT"))
+    parser.add_argument("--write", type=str.upper, nargs="+", default=["WB"],
+                        choices=("WT", "WB", "WA"))
+    parser.add_argument("--format", default="auto", choices=TRACE_FORMATS)
+    parser.add_argument("--memory", default="auto", choices=("auto", "list", "sparse", "mmap"))
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--csv", help="write the results table as CSV")
+    parser.add_argument("--json", help="write the results table as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_sweep_args(argv)
+    configs = build_configs(
+        [2 ** e for e in args.cache_exp],
+        [2 ** e for e in args.block_exp],
+        args.mapping,
+        args.replacement,
+        args.write,
+    )
+    if not configs:
+        print("No valid configurations to run.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = sweep(read_trace(args.trace, args.format), configs, 2 ** args.mem_exp,
+                    args.jobs, args.memory)
+    elapsed = time.perf_counter() - start
+
+    for r in results:
+        print(f"{r['cache_size']:>8} {r['block_size']:>5} {r['mapping']:>8} "
+              f"{r['replacement']:>5} {r['write']:>3}  hits={r['hits']} misses={r['misses']} "
+              f"ratio={r['hit_ratio']:.4f} writebacks={r['writebacks']} ({r['seconds']:.2f}s)")
+    print(f"{len(results)} configurations in {elapsed:.2f}s")
+
+    write_results(results, args.csv, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from cache import Cache
+from checkpoint import save_checkpoint, load_checkpoint, resume_opt
+from mainMem import Memory, SparseMemory
+from replacement import build_next_use
+from simulator import batch_main
+from workloads import make_workload
+
+# =========================================================
+# Checkpoint save / resume
+# A run resumed from a checkpoint must carry on exactly as the run it
+# was saved from would have.
+# =========================================================
+
+MEM_SIZE = 1 << 12
+SPLIT = 2500
+
+
+def workload(n=6000, mem_size=MEM_SIZE):
+    # A zipf workload on MEM_SIZE bytes, its 64-byte items spread out
+    # evenly over mem_size bytes
+    spread = mem_size // MEM_SIZE
+    return [(step[0], step[1] // 64 * 64 * spread + step[1] % 64) + step[2:]
+            for step in make_workload("zipf", n, MEM_SIZE, write_ratio=0.3, seed=1)]
+
+
+def write_text_trace(path, sequence):
+    with open(path, "w") as f:
+        for step in sequence:
+            print(*step, file=f)
+
+
+def counters(cache):
+    return cache.hits, cache.misses, cache.writebacks
+
+
+def resume_matches(tmp_path, new_memory, mem_size, storage, mapped=False):
+    # Runs the workload straight through, and again split by a
+    # checkpoint; both must end with the same counters and contents
+    sequence = workload(mem_size=mem_size)
+    full = Cache(1024, 16, 4, "LRU", "WB", storage=storage)
+    full_memory = new_memory()
+    full.access_sequence(sequence, full_memory)
+
+    cache = Cache(1024, 16, 4, "LRU", "WB", storage=storage)
+    memory = new_memory()
+    cache.access_sequence(sequence[:SPLIT], memory)
+    save_checkpoint(str(tmp_path / "c.ckpt"), cache, memory)
+
+    checkpoint = load_checkpoint(str(tmp_path / "c.ckpt"), mapped=mapped)
+    assert checkpoint.position == SPLIT
+    checkpoint.cache.access_sequence(sequence[SPLIT:], checkpoint.memory)
+    assert counters(checkpoint.cache) == counters(full)
+    for step in sequence:
+        assert checkpoint.cache.read(step[1], checkpoint.memory) == full.read(step[1], full_memory)
+
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    for storage in ("objects", "compact"):
+        resume_matches(tmp_path, lambda: Memory(MEM_SIZE), MEM_SIZE, storage)
+        resume_matches(tmp_path, lambda: Memory(MEM_SIZE), MEM_SIZE, storage, mapped=True)
+
+
+def test_sparse_resume_matches_uninterrupted_run(tmp_path):
+    # Address spaces far beyond any flat image: saved as page records
+    for mem_size in (1 << 40, 1 << 48, 1 << 64):
+        resume_matches(tmp_path, lambda: SparseMemory(mem_size), mem_size, "compact")
+        assert (tmp_path / "c.ckpt").stat().st_size < 1 << 24
+
+
+def test_opt_resume_matches_uninterrupted_run(tmp_path):
+    sequence = workload()
+    addrs = [step[1] for step in sequence]
+    for storage in ("objects", "compact"):
+        full = Cache(1024, 16, 4, "OPT", "WB", storage=storage, future=build_next_use(addrs, 16))
+        full.access_sequence(sequence, Memory(MEM_SIZE))
+
+        cache = Cache(1024, 16, 4, "OPT", "WB", storage=storage, future=build_next_use(addrs, 16))
+        memory = Memory(MEM_SIZE)
+        cache.access_sequence(sequence[:SPLIT], memory)
+        save_checkpoint(str(tmp_path / "o.ckpt"), cache, memory)
+
+        checkpoint = load_checkpoint(str(tmp_path / "o.ckpt"))
+        resume_opt(checkpoint.cache, addrs, checkpoint.position)
+        checkpoint.cache.access_sequence(sequence[SPLIT:], checkpoint.memory)
+        assert counters(checkpoint.cache) == counters(full)
+
+
+def test_cli_opt_save_and_resume(tmp_path, capsys):
+    sequence = workload()
+    write_text_trace(tmp_path / "prefix.txt", sequence[:SPLIT])
+    write_text_trace(tmp_path / "full.txt", sequence)
+    config = ["12", "10", "4", "set:4", "OPT", "WB"]
+
+    batch_main(config + [str(tmp_path / "prefix.txt"), "--save-checkpoint", str(tmp_path / "o.ckpt")])
+    capsys.readouterr()
+    batch_main(config + [str(tmp_path / "full.txt"), "--resume", str(tmp_path / "o.ckpt")])
+    hits, misses = [int(part.split(": ")[1]) for part in capsys.readouterr().out.split(", ")[:2]]
+    assert hits + misses == len(sequence)
@@ -0,0 +1,52 @@
+from hierarchy import build_hierarchy
+from workloads import make_workload
+
+# =========================================================
+# Hierarchy inclusion invariants
+# After every access: an inclusive hierarchy holds each L1 block in
+# L2 as well, an exclusive one never holds a block in both, and every
+# policy reads back the last value written.
+# =========================================================
+
+MEM_SIZE = 1 << 12
+
+LEVELS = [
+    {"cache_size": 128, "block_size": 8, "mapping": "set:2", "replacement": "LRU",
+     "write": "WB", "latency": 1},
+    {"cache_size": 512, "block_size": 8, "mapping": "set:4", "replacement": "FIFO",
+     "write": "WB", "latency": 10},
+]
+
+
+def cached_blocks(cache):
+    return {tag * cache.num_sets + set_index
+            for set_index, tags in enumerate(cache.tag_index) for tag in tags}
+
+
+def replay_checked(inclusion, check):
+    hierarchy = build_hierarchy(MEM_SIZE, LEVELS, inclusion)
+    l1, l2 = hierarchy.caches
+    values = {}
+    for step in make_workload("zipf", 4000, MEM_SIZE, write_ratio=0.3, seed=3, item_size=8):
+        if step[0] == "read":
+            assert hierarchy.read(step[1]) == values.get(step[1], 0)
+        else:
+            hierarchy.write(step[1], step[2])
+            values[step[1]] = step[2]
+        check(cached_blocks(l1), cached_blocks(l2))
+
+
+def test_inclusive_l1_is_subset_of_l2():
+    def check(l1, l2):
+        assert l1 <= l2
+    replay_checked("inclusive", check)
+
+
+def test_exclusive_levels_are_disjoint():
+    def check(l1, l2):
+        assert not l1 & l2
+    replay_checked("exclusive", check)
+
+
+def test_non_inclusive_reads_last_write():
+    replay_checked("non-inclusive", lambda l1, l2: None)
@@ -0,0 +1,45 @@
+from cache import Cache
+from mainMem import Memory
+from replacement import build_next_use
+from workloads import make_workload
+
+# =========================================================
+# OPT against a brute-force Belady's MIN
+# MIN's miss count does not depend on how ties are broken, so the heap
+# based OPTPolicy must miss exactly as often as a naive MIN that scans
+# the rest of the trace on every eviction.
+# =========================================================
+
+MEM_SIZE = 1 << 12
+
+
+def brute_force_min(blocks, num_sets, associativity):
+    misses = 0
+    sets = [set() for _ in range(num_sets)]
+    for i, block_num in enumerate(blocks):
+        cached = sets[block_num % num_sets]
+        if block_num in cached:
+            continue
+        misses += 1
+        if len(cached) == associativity:
+            def next_use(candidate):
+                for j in range(i + 1, len(blocks)):
+                    if blocks[j] == candidate:
+                        return j
+                return len(blocks)
+            cached.remove(max(cached, key=next_use))
+        cached.add(block_num)
+    return misses
+
+
+def test_opt_matches_brute_force_min():
+    block_size = 16
+    for name, params in (("zipf", {}), ("random", {}), ("loop", {"working_set": 1536, "stride": 16})):
+        sequence = list(make_workload(name, 2000, MEM_SIZE, write_ratio=0.3, seed=2, **params))
+        addrs = [step[1] for step in sequence]
+        blocks = [a // block_size for a in addrs]
+        for associativity in (2, 4, 64):
+            cache = Cache(1024, block_size, associativity, "OPT", "WB",
+                          future=build_next_use(addrs, block_size))
+            cache.access_sequence(sequence, Memory(MEM_SIZE))
+            assert cache.misses == brute_force_min(blocks, cache.num_sets, associativity)
@@ -0,0 +1,77 @@
+import json
+
+from cache import Cache
+from mainMem import Memory
+from sampling import set_sample, interval_sample
+from simulator import batch_main
+from trace_reader import BinaryTrace, convert_trace, read_trace
+from workloads import make_workload
+
+# =========================================================
+# Regression: sampling a text trace
+# A text trace is a one-shot generator; sampling used to exhaust it
+# while building the ops column and then simulate nothing.
+# =========================================================
+
+MEM_SIZE = 1 << 12
+
+
+def write_text_trace(path, n=5000):
+    with open(path, "w") as f:
+        for step in make_workload("zipf", n, MEM_SIZE, write_ratio=0.3, seed=1):
+            print(*step, file=f)
+
+
+def new_cache():
+    return Cache(256, 8, 2, "LRU", "WB")
+
+
+def test_set_sample_text_trace_matches_binary(tmp_path):
+    text = tmp_path / "t.txt"
+    write_text_trace(text)
+    convert_trace(str(text), str(tmp_path / "t.bin"))
+
+    from_text = set_sample(new_cache(), Memory(MEM_SIZE), read_trace(str(text)), 0.5)
+    with BinaryTrace(str(tmp_path / "t.bin")) as trace:
+        from_binary = set_sample(new_cache(), Memory(MEM_SIZE), trace, 0.5)
+
+    assert from_text.total == 5000
+    assert from_text.accesses > 0
+    assert (from_text.hits, from_text.accesses) == (from_binary.hits, from_binary.accesses)
+
+
+def test_interval_sample_text_trace_matches_binary(tmp_path):
+    text = tmp_path / "t.txt"
+    write_text_trace(text)
+    convert_trace(str(text), str(tmp_path / "t.bin"))
+
+    from_text = interval_sample(new_cache(), Memory(MEM_SIZE), read_trace(str(text)), 1000, 100, 200)
+    with BinaryTrace(str(tmp_path / "t.bin")) as trace:
+        from_binary = interval_sample(new_cache(), Memory(MEM_SIZE), trace, 1000, 100, 200)
+
+    assert from_text.total == 5000
+    assert from_text.samples == 5
+    assert from_text.accesses == 1000
+    assert (from_text.hits, from_text.half_width) == (from_binary.hits, from_binary.half_width)
+
+
+def test_cli_sampling_text_trace(tmp_path, capsys):
+    text = tmp_path / "t.txt"
+    write_text_trace(text)
+
+    for option in (["--sample-sets", "0.5"], ["--sample-interval", "1000", "100", "200"]):
+        batch_main(["12", "8", "3", "set:2", "LRU", "WB", str(text)] + option)
+        out = capsys.readouterr().out
+        assert "of 5000 accesses" in out
+        assert "simulated 0 " not in out
+
+
+def test_cli_sampling_json(tmp_path, capsys):
+    text = tmp_path / "t.txt"
+    write_text_trace(text)
+
+    batch_main(["12", "8", "3", "set:2", "LRU", "WB", str(text), "--sample-sets", "0.5",
+                "--output-format", "json"])
+    final = json.loads(capsys.readouterr().out)["final"]
+    assert final["total"] == 5000
+    assert final["hits"] + final["misses"] == final["accesses"] > 0
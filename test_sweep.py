@@ -0,0 +1,24 @@
+from sweep import build_configs, valid_config
+
+# =========================================================
+# Sweep configuration filtering
+# The cross product of the sweep options contains geometries no cache
+# can have; build_configs must drop them, not abort the sweep.
+# =========================================================
+
+
+def test_build_configs_skips_invalid_geometries():
+    configs = build_configs([32, 1024], [16, 64], ["direct", "set:4", "full"], ["LRU"], ["WB"])
+    assert (32, 16, "set:4", "LRU", "WB") not in configs     # 2 lines: 4 does not divide them
+    assert (32, 64, "direct", "LRU", "WB") not in configs    # Block larger than the cache
+    assert (32, 16, "direct", "LRU", "WB") in configs
+    assert (32, 16, "full", "LRU", "WB") in configs
+    assert (1024, 64, "set:4", "LRU", "WB") in configs
+    assert len(configs) == 2 + 3 + 3
+
+
+def test_valid_config_rejects_bad_mappings():
+    assert not valid_config(1024, 16, "set:0")
+    assert not valid_config(1024, 16, "set:x")
+    assert not valid_config(1024, 16, "banked")
+    assert valid_config(1024, 16, "set:64")
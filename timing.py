@@ -0,0 +1,220 @@
+import heapq, sys
+
+from cache import Cache
+from fastpath import bind_decoders
+from mainMem import Memory
+from workloads import make_workload
+
+# =========================================================
+# Non-blocking cache timing model
+# Cache itself is functional: every miss is serviced at once. A
+# TimingModel adds a cycle-approximate clock around it without changing
+# any hit or miss:
+#   - it sits between the Cache and its Memory (same read_block /
+#     write_block / read_byte / write_byte interface, like WriteBuffer),
+#     so every block fetch, writeback and write-through store is seen
+#   - it is attached to the Cache (like prefetch.Prefetcher) to see
+#     every demand access
+#
+# The core issues one access per cycle and never waits for data (the
+# trace carries no dependences), so it only stalls on structural limits:
+#   - a primary miss needs a free MSHR (miss status holding register);
+#     when all are busy the core stalls until the oldest miss returns
+#   - an access to a block still in flight is a secondary miss: it is
+#     merged into that block's MSHR (the functional cache already
+#     counts it as a hit); when the MSHR already holds `targets`
+#     merged accesses the core stalls until the block returns
+# Memory: a request's data starts `latency` cycles after it is sent
+# and crosses a bus moving `bandwidth` bytes per cycle, one transfer at
+# a time. Writebacks and write-through stores use the bus too, but no
+# MSHR (they are posted).
+#
+# Reports cycles, stall cycles, mean MSHR occupancy (outstanding misses
+# per cycle) and memory-level parallelism (mean outstanding misses over
+# the cycles with at least one).
+# =========================================================
+
+class TimingModel:
+    def __init__(self, mshrs=4, latency=100, bandwidth=8, targets=4, memory=None):
+        if mshrs < 1 or targets < 1 or latency < 0 or bandwidth < 1:
+            raise ValueError("Timing model needs mshrs, targets, bandwidth >= 1 and latency >= 0.")
+        self.mshrs = mshrs                  # Primary misses outstanding at once
+        self.latency = latency              # Cycles from request to first data
+        self.bandwidth = bandwidth          # Bus bytes per cycle
+        self.targets = targets              # Secondary misses merged per MSHR
+        self.memory = memory                # Memory behind the model (set before use)
+        self.cache = None
+
+        self.cycle = 0                      # Cycle the next access issues in
+        self.bus_free = 0                   # First cycle the bus is idle
+        self.outstanding = []               # Heap of (ready cycle, block) per busy MSHR
+        self.in_flight = {}                 # Block number -> [ready cycle, merged accesses]
+
+        self.accesses = 0
+        self.primary_misses = 0
+        self.secondary_misses = 0           # Merged into an in-flight MSHR
+        self.stall_cycles = 0
+        self.mshr_full_stalls = 0           # Stalls waiting for a free MSHR
+        self.target_full_stalls = 0         # Stalls waiting on a full MSHR's block
+        self.bus_bytes = 0
+
+        # Occupancy: sum of miss lifetimes, and cycles with >= 1 miss outstanding
+        self.miss_cycles = 0
+        self.busy_cycles = 0
+        self.covered_until = 0
+
+    @property
+    def size(self):
+        return self.memory.size
+
+    # ---------------- hooking into a Cache ----------------
+    def attach(self, cache):
+        self.cache = cache
+        inner_read = cache.read_decoded
+        inner_write = cache.write_decoded
+
+        def read_decoded(block_num, tag, set_index, offset, memory):
+            self.issue(block_num)
+            value = inner_read(block_num, tag, set_index, offset, memory)
+            self.cycle += 1
+            return value
+
+        def write_decoded(address, value, block_num, tag, set_index, offset, memory):
+            self.issue(block_num)
+            inner_write(address, value, block_num, tag, set_index, offset, memory)
+            self.cycle += 1
+
+        cache.read_decoded = read_decoded
+        cache.write_decoded = write_decoded
+        bind_decoders(cache)
+        return self
+
+    def issue(self, block_num):
+        # A demand access to block_num issues this cycle
+        self.accesses += 1
+        self.retire()
+        entry = self.in_flight.get(block_num)
+        if entry is None:
+            return
+
+        self.secondary_misses += 1
+        if entry[1] == self.targets:
+            self.target_full_stalls += 1
+            self.stall(entry[0])
+            self.retire()
+        else:
+            entry[1] += 1
+
+    def retire(self):
+        # Frees the MSHRs whose block has returned by now
+        outstanding = self.outstanding
+        while outstanding and outstanding[0][0] <= self.cycle:
+            ready, block_num = heapq.heappop(outstanding)
+            entry = self.in_flight.get(block_num)
+            if entry is not None and entry[0] == ready:
+                del self.in_flight[block_num]
+
+    def stall(self, until):
+        if until > self.cycle:
+            self.stall_cycles += until - self.cycle
+            self.cycle = until
+
+    def transfer(self, size, start):
+        # Moves size bytes over the bus, starting no earlier than `start`;
+        # returns the cycle the last byte arrives
+        start = max(start, self.bus_free)
+        self.bus_free = start + -(-size // self.bandwidth)
+        self.bus_bytes += size
+        return self.bus_free
+
+    # ---------------- memory side ----------------
+    def read_block(self, block_num, block_size):
+        # A block fetch: a primary miss (or prefetch) holding one MSHR
+        self.retire()
+        if len(self.outstanding) == self.mshrs:
+            self.mshr_full_stalls += 1
+            self.stall(self.outstanding[0][0])
+            self.retire()
+
+        issue = self.cycle
+        ready = self.transfer(block_size, issue + self.latency)
+        key = block_num * block_size // self.cache.block_size if self.cache else block_num
+        heapq.heappush(self.outstanding, (ready, key))
+        self.in_flight[key] = [ready, 0]
+        self.primary_misses += 1
+
+        self.miss_cycles += ready - issue
+        self.busy_cycles += max(0, ready - max(issue, self.covered_until))
+        self.covered_until = max(self.covered_until, ready)
+        return self.memory.read_block(block_num, block_size)
+
+    def write_block(self, block_num, block_data):
+        self.transfer(len(block_data), self.cycle)
+        self.memory.write_block(block_num, block_data)
+
+    def read_byte(self, address):
+        return self.memory.read_byte(address)
+
+    def write_byte(self, address, value):
+        self.transfer(1, self.cycle)
+        self.memory.write_byte(address, value)
+
+    # ---------------- statistics ----------------
+    def total_cycles(self):
+        # Until the last access issued and every miss and store completed
+        last = max((ready for ready, _ in self.outstanding), default=0)
+        return max(self.cycle, last, self.bus_free)
+
+    def occupancy(self):
+        cycles = self.total_cycles()
+        return self.miss_cycles / cycles if cycles else 0
+
+    def mlp(self):
+        return self.miss_cycles / self.busy_cycles if self.busy_cycles else 0
+
+    def summary(self):
+        cycles = self.total_cycles()
+        return {
+            "cycles": cycles,
+            "stall_cycles": self.stall_cycles,
+            "primary_misses": self.primary_misses,
+            "secondary_misses": self.secondary_misses,
+            "occupancy": round(self.occupancy(), 6),
+            "mlp": round(self.mlp(), 6),
+        }
+
+    def print_report(self):
+        cycles = self.total_cycles()
+        ipc = self.accesses / cycles if cycles else 0
+        mean_latency = self.miss_cycles / self.primary_misses if self.primary_misses else 0
+        print(f"Timing ({self.mshrs} MSHRs x {self.targets} targets, latency {self.latency}, "
+              f"{self.bandwidth} B/cycle): {cycles} cycles, {ipc:.3f} accesses/cycle, "
+              f"{self.stall_cycles} stall cycles ({self.mshr_full_stalls} MSHR-full, "
+              f"{self.target_full_stalls} target-full)")
+        print(f"  {self.primary_misses} primary misses (mean latency {mean_latency:.1f}), "
+              f"{self.secondary_misses} merged secondary misses, {self.bus_bytes} bus bytes, "
+              f"MSHR occupancy {self.occupancy():.2f}, MLP {self.mlp():.2f}")
+
+
+def mlp_demo(accesses=20_000):
+    # Cycles and MLP of a few workloads as the MSHR count grows
+    mem_size = 1 << 16
+    print(f"{'workload':>10} {'MSHRs':>5} {'cycles':>9} {'stalls':>9} {'occupancy':>9} {'MLP':>6}")
+    for name, params in (("sequential", {}), ("strided", {"stride": 64}), ("random", {}),
+                         ("zipf", {"alpha": 1.0})):
+        sequence = list(make_workload(name, accesses, mem_size, 0.2, 0, **params))
+        for mshrs in (1, 2, 4, 8, 16):
+            timing = TimingModel(mshrs=mshrs, memory=Memory(mem_size))
+            cache = Cache(4096, 32, 4, "LRU", "WB", seed=0)
+            timing.attach(cache)
+            for step in sequence:
+                if step[0] == "read":
+                    cache.read(step[1], timing)
+                else:
+                    cache.write(step[1], step[2], timing)
+            print(f"{name:>10} {mshrs:>5} {timing.total_cycles():>9} {timing.stall_cycles:>9} "
+                  f"{timing.occupancy():>9.2f} {timing.mlp():>6.2f}")
+
+
+if __name__ == "__main__":
+    mlp_demo(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,283 @@
+from array import array
+import mmap, os, shutil, struct, sys, tempfile
+
+# =========================================================
+# Streaming trace readers
+# Every reader is a generator that yields the same tuples the
+# simulator already uses for TEST_SEQUENCE:
+#   ("read", addr)  or  ("write", addr, value)
+# so a trace of any length is replayed with constant memory.
+# =========================================================
+
+TRACE_FORMATS = ("auto", "sim", "dinero", "lackey", "binary")
+
+# Dinero "din" labels: 0 = data read, 1 = data write, 2 = instruction fetch
+DINERO_LABELS = {"0": "read", "1": "write", "2": "read", "r": "read", "w": "write"}
+
+
+def parse_number(text):
+    # Decimal like the interactive format (leading zeros allowed: "010"
+    # is 10), or hex with a 0x prefix
+    if text[:2].lower() == "0x":
+        return int(text, 16)
+    return int(text, 10)
+
+
+def parse_sim_line(line):
+    # Parses the interactive format accepted by custom_config:
+    #   read <address>  |  write <address> <value>
+    # Returns the access tuple, or None for a blank line. Values are
+    # stored modulo 256, as in binary traces, so every memory backend
+    # accepts them.
+    parts = line.split()
+    if not parts:
+        return None
+
+    op = parts[0].lower()
+    try:
+        if op == "read" and len(parts) == 2:
+            return ("read", parse_number(parts[1]))
+        if op == "write" and len(parts) == 3:
+            return ("write", parse_number(parts[1]), parse_number(parts[2]) & 0xFF)
+    except ValueError:
+        pass
+    raise ValueError(f"Bad trace line: {line.strip()!r}")
+
+
+def parse_dinero_line(line):
+    # Dinero-style text: "<label> <hex address>" where the label is
+    # 0/1/2 (din format) or r/w. Extra columns (size, etc.) are ignored.
+    parts = line.split()
+    if not parts:
+        return None
+
+    op = DINERO_LABELS.get(parts[0].lower())
+    if op is None or len(parts) < 2:
+        raise ValueError(f"Bad dinero line: {line.strip()!r}")
+
+    address = int(parts[1], 16)
+    if op == "write":
+        return ("write", address, 0)    # Traces carry no data; store a zero byte
+    return ("read", address)
+
+
+def parse_lackey_lines(line, include_ifetch=False):
+    # valgrind --tool=lackey output:
+    #   "I  04000aa0,3"  instruction fetch
+    #   " L 7ff000398,8" load, " S ..." store, " M ..." modify (load + store)
+    # Lines starting with "==" are valgrind banners and are skipped.
+    # Yields zero, one or two accesses per line.
+    stripped = line.strip()
+    if not stripped or stripped.startswith("=="):
+        return
+
+    kind, _, rest = stripped.partition(" ")
+    address = int(rest.strip().split(",")[0], 16)
+
+    if kind == "L":
+        yield ("read", address)
+    elif kind == "S":
+        yield ("write", address, 0)
+    elif kind == "M":
+        yield ("read", address)
+        yield ("write", address, 0)
+    elif kind == "I":
+        if include_ifetch:
+            yield ("read", address)
+    else:
+        raise ValueError(f"Bad lackey line: {line.strip()!r}")
+
+
+def detect_format(line):
+    # Guess the trace format from its first meaningful line
+    stripped = line.strip()
+    if stripped.startswith("==") or line[:2] in ("I ", " L", " S", " M"):
+        return "lackey"
+
+    first = stripped.split()[0].lower() if stripped else ""
+    if first in ("read", "write"):
+        return "sim"
+    if first in DINERO_LABELS:
+        return "dinero"
+    raise ValueError(f"Cannot detect trace format from line: {stripped!r}")
+
+
+def iter_trace_lines(lines, fmt="auto", include_ifetch=False):
+    # Turns an iterable of text lines into a stream of access tuples.
+    # Comment lines ("#") are skipped in every format.
+    if fmt not in TRACE_FORMATS:
+        raise ValueError(f"Unknown trace format: {fmt}")
+
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+
+        if fmt == "auto":
+            fmt = detect_format(line)
+
+        if fmt == "lackey":
+            yield from parse_lackey_lines(line, include_ifetch)
+        elif fmt == "dinero":
+            yield parse_dinero_line(line)
+        else:
+            yield parse_sim_line(line)
+
+
+def read_trace(source, fmt="auto", include_ifetch=False):
+    # Streams a trace from a file path, "-" (stdin) or an open text file.
+    # Binary traces (see below) are recognized by their header.
+    if isinstance(source, str) and source != "-" and (
+            fmt == "binary" or (fmt == "auto" and is_binary_trace(source))):
+        with BinaryTrace(source) as trace:
+            yield from trace
+        return
+
+    if fmt == "binary":
+        raise ValueError("Binary traces must be read from a file path.")
+    if source == "-":
+        yield from iter_trace_lines(sys.stdin, fmt, include_ifetch)
+    elif hasattr(source, "read"):
+        yield from iter_trace_lines(source, fmt, include_ifetch)
+    else:
+        with open(source, "r") as f:
+            yield from iter_trace_lines(f, fmt, include_ifetch)
+
+
+
+# =========================================================
+# Binary trace format
+# A converted trace is one file laid out in columns, so each column can
+# be memory-mapped and used in place as a typed array:
+#   header  16 bytes: magic b"CTRC", version (uint32), count (uint64)
+#   addrs   count x uint64   (little-endian)
+#   ops     count x uint8    (0 = read, 1 = write)
+#   values  count x uint8    (byte stored by a write, 0 for reads)
+# That is 10 bytes per access instead of a ~100 byte tuple, and opening
+# a trace of any length only maps the file. Write values are stored
+# modulo 256, like every memory backend except the list-based Memory.
+# =========================================================
+
+BINARY_MAGIC = b"CTRC"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sIQ")
+
+
+def is_binary_trace(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    except OSError:
+        return False
+
+
+def write_binary_trace(sequence, path):
+    # Writes any stream of access tuples; ops and values are spooled to
+    # temporary files so the stream is never held in memory.
+    # Returns the number of accesses written.
+    count = 0
+    addrs = array("Q")
+    ops = bytearray()
+    values = bytearray()
+
+    with open(path, "wb") as out, tempfile.TemporaryFile() as ops_file, \
+            tempfile.TemporaryFile() as values_file:
+        out.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0))
+
+        for step in sequence:
+            addrs.append(step[1])
+            if step[0] == "write":
+                ops.append(1)
+                values.append(step[2] & 0xFF)
+            else:
+                ops.append(0)
+                values.append(0)
+
+            if len(ops) == 1 << 16:
+                count += _flush_columns(out, ops_file, values_file, addrs, ops, values)
+                addrs = array("Q")
+                ops = bytearray()
+                values = bytearray()
+        count += _flush_columns(out, ops_file, values_file, addrs, ops, values)
+
+        for column in (ops_file, values_file):
+            column.seek(0)
+            shutil.copyfileobj(column, out)
+
+        out.seek(0)
+        out.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, count))
+    return count
+
+
+def _flush_columns(out, ops_file, values_file, addrs, ops, values):
+    if sys.byteorder != "little":
+        addrs.byteswap()
+    addrs.tofile(out)
+    ops_file.write(ops)
+    values_file.write(values)
+    return len(ops)
+
+
+def convert_trace(source, path, fmt="auto", include_ifetch=False):
+    # Text trace (any format read_trace accepts) -> binary trace file
+    return write_binary_trace(read_trace(source, fmt, include_ifetch), path)
+
+
+class BinaryTrace:
+    # Memory-mapped binary trace. addrs / ops / values are zero-copy
+    # typed views (memoryview casts) over the mapping, usable directly
+    # as Cache.access_many(ops, addrs, memory, values) arguments;
+    # iterating yields the usual access tuples lazily.
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < BINARY_HEADER.size:
+                raise ValueError(f"Not a binary trace: {path}")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = BINARY_HEADER.unpack_from(self.map)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"Not a binary trace (or unknown version): {path}")
+        if size != BINARY_HEADER.size + count * 10:
+            raise ValueError(f"Truncated binary trace: {path}")
+        if sys.byteorder != "little":
+            raise ValueError("Binary traces are little-endian; big-endian hosts are not supported.")
+
+        self.count = count
+        view = memoryview(self.map)
+        start = BINARY_HEADER.size
+        self.addrs = view[start:start + count * 8].cast("Q")
+        self.ops = view[start + count * 8:start + count * 9]
+        self.values = view[start + count * 9:start + count * 10]
+        self.view = view
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        addrs, ops, values = self.addrs, self.ops, self.values
+        for i in range(self.count):
+            if ops[i]:
+                yield ("write", addrs[i], values[i])
+            else:
+                yield ("read", addrs[i])
+
+    def close(self):
+        # Views must be released before the mapping can be closed
+        for view in (self.addrs, self.ops, self.values, self.view):
+            view.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python trace_reader.py SOURCE DEST [FORMAT]  -> convert to binary
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python trace_reader.py SOURCE DEST [FORMAT]")
+        sys.exit(1)
+    n = convert_trace(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) == 4 else "auto")
+    print(f"Wrote {n} accesses to {sys.argv[2]}")
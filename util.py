@@ -1,19 +1,170 @@
-def parse_args():
-    import sys
-    if len(sys.argv) != 7:
-        print("All EXP are 2^X, thus 10 = 2^10 Bytes")
-        print("\nMap Policy: direct , full , set:N")
-        print("\nReply Policy: RAND , LRU , FIFO , LFU")
-        print("\nWrite Policy: WT , WB")
-        print("\nUsage: simulator.py MEM_EXP CACHE_EXP BLOCK_EXP MAP_POLICY REPL_POLICY WRITE_POLICY")
-        sys.exit(1)
-    mem_size = 2 ** int(sys.argv[1])
-    cache_size = 2 ** int(sys.argv[2])
-    block_size = 2 ** int(sys.argv[3])
-    mapping = sys.argv[4]
-    replacement = sys.argv[5]
-    write = sys.argv[6]
-    return mem_size, cache_size, block_size, mapping, replacement, write
+def parse_args(argv=None):
+    import argparse
+    from trace_reader import TRACE_FORMATS
+    parser = argparse.ArgumentParser(
+        prog="simulator.py",
+        description="All EXP are 2^X, thus 10 = 2^10 Bytes",
+        epilog="Map Policy: direct , full , set:N    "
+               "Repl Policy: RAND , LRU , FIFO , LFU , OPT    "
+               "Write Policy: WT , WB , WA",
+    )
+    parser.add_argument("mem_exp", metavar="MEM_EXP", type=int)
+    parser.add_argument("cache_exp", metavar="CACHE_EXP", type=int)
+    parser.add_argument("block_exp", metavar="BLOCK_EXP", type=int)
+    parser.add_argument("mapping", metavar="MAP_POLICY", type=str.lower)
+    parser.add_argument("replacement", metavar="REPL_POLICY", type=str.upper,
+                        choices=("RAND", "LRU", "FIFO", "LFU", "OPT"))
+    parser.add_argument("write", metavar="WRITE_POLICY", type=str.upper,
+                        choices=("WT", "WB", "WA"))
+    parser.add_argument("trace", metavar="TRACE", nargs="?", default="-",
+                        help="trace file to replay, '-' reads stdin (default)")
+    parser.add_argument("--format", default="auto",
+                        choices=TRACE_FORMATS,
+                        help="trace format (default: detect from first line)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for RAND replacement (default: 0, so runs repeat exactly)")
+    parser.add_argument("--storage", default="objects", choices=("objects", "compact"),
+                        help="cache line storage backend (compact: typed arrays + data slab)")
+    parser.add_argument("--memory", default="auto", choices=("auto", "list", "sparse", "mmap"),
+                        help="main memory backend (auto: list up to 2^24 bytes, sparse above)")
+    parser.add_argument("--ifetch", action="store_true",
+                        help="replay lackey instruction fetches as reads")
+    parser.add_argument("--prefetch", default="none", choices=("none", "next-line", "stride", "stream"),
+                        help="hardware prefetcher watching the demand miss stream")
+    parser.add_argument("--prefetch-degree", type=int, default=1,
+                        help="blocks prefetched per trigger (default: 1)")
+    parser.add_argument("--prefetch-latency", type=int, default=0,
+                        help="accesses before a prefetch fills (default: 0, immediate)")
+    parser.add_argument("--write-buffer", type=int, default=0, metavar="ENTRIES",
+                        help="coalescing write buffer in front of memory (default: 0, none)")
+    parser.add_argument("--classify", action="store_true",
+                        help="report compulsory/capacity/conflict misses, writebacks and a set heatmap")
+    parser.add_argument("--sample-sets", type=float, metavar="FRACTION",
+                        help="simulate only this fraction of the sets and estimate the hit ratio")
+    parser.add_argument("--sample-interval", type=int, nargs=3, metavar=("PERIOD", "WARMUP", "MEASURE"),
+                        help="per PERIOD accesses, skip, warm up WARMUP and measure MEASURE")
+    parser.add_argument("--sector-size", type=int, metavar="BYTES",
+                        help="sector cache: per-sector valid/dirty bits, report bytes moved to/from memory")
+    parser.add_argument("--mshrs", type=int, default=0,
+                        help="non-blocking timing model with this many MSHRs (default: 0, off)")
+    parser.add_argument("--mem-latency", type=int, default=100,
+                        help="timing model: cycles from a memory request to its first data (default: 100)")
+    parser.add_argument("--mem-bandwidth", type=int, default=8,
+                        help="timing model: memory bus bytes per cycle (default: 8)")
+    parser.add_argument("--report-interval", type=int, default=0, metavar="N",
+                        help="also report the hit ratio of every N accesses (default: 0, final only)")
+    parser.add_argument("--output-format", default="text", choices=("text", "json", "csv"),
+                        help="final (and interval) stats as text, JSON or CSV (default: text)")
+    parser.add_argument("--resume", metavar="CHECKPOINT",
+                        help="start from a saved cache/memory state, skipping the accesses it already ran")
+    parser.add_argument("--save-checkpoint", metavar="PATH",
+                        help="save the final cache/memory state to PATH")
+
+    args = parser.parse_args(argv)
+    args.mem_size = 2 ** args.mem_exp
+    args.cache_size = 2 ** args.cache_exp
+    args.block_size = 2 ** args.block_exp
+
+    # Sampled runs only estimate the hit ratio of a plain Cache
+    if args.sample_sets is not None or args.sample_interval:
+        if args.sample_sets is not None and args.sample_interval:
+            parser.error("Use either --sample-sets or --sample-interval, not both.")
+        if args.sample_sets is not None and not 0 < args.sample_sets <= 1:
+            parser.error("--sample-sets FRACTION must be in (0, 1].")
+        if args.replacement == "OPT":
+            parser.error("OPT replacement needs the whole trace; it cannot be sampled.")
+        unsupported = [flag for flag, used in (
+            ("--sector-size", args.sector_size),
+            ("--prefetch", args.prefetch != "none"),
+            ("--write-buffer", args.write_buffer),
+            ("--classify", args.classify),
+            ("--mshrs", args.mshrs),
+            ("--resume", args.resume),
+            ("--save-checkpoint", args.save_checkpoint),
+            ("--report-interval", args.report_interval),
+        ) if used]
+        if unsupported:
+            parser.error(f"Sampling cannot be combined with {', '.join(unsupported)}.")
+
+    from mainMem import check_memory
+    try:
+        check_memory(args.mem_size, args.memory)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Same geometry checks as custom_config
+    if args.block_exp < 0 or args.cache_exp < args.block_exp:
+        parser.error("Block size must be <= cache size (BLOCK_EXP <= CACHE_EXP).")
+    if args.mem_exp < args.block_exp:
+        parser.error("Memory must hold at least one block (BLOCK_EXP <= MEM_EXP).")
+    try:
+        associativity = get_associativity(args.mapping, args.cache_size // args.block_size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.prefetch != "none" and args.replacement == "OPT":
+        parser.error("OPT replacement ranks lines by the trace's next uses; it cannot be "
+                     "combined with --prefetch.")
+
+    # Checkpoints hold a plain Cache; check before any of the trace runs
+    if args.sector_size and args.save_checkpoint:
+        parser.error("A sector cache cannot be checkpointed; drop --sector-size or --save-checkpoint.")
+    if args.resume:
+        check_resume(parser, args, associativity)
+    return args
+
+
+def check_resume(parser, args, associativity):
+    # A resumed run carries on with the checkpoint's cache and memory, so
+    # the command line must describe that same configuration
+    from checkpoint import read_checkpoint_config
+    from mainMem import LIST_MEMORY_LIMIT
+    if args.sector_size:
+        parser.error("--resume restores a plain Cache; it cannot be combined with --sector-size.")
+    try:
+        config, memory = read_checkpoint_config(args.resume)
+    except (OSError, ValueError) as e:
+        parser.error(f"Cannot read checkpoint: {e}")
+
+    backend = args.memory
+    if backend == "auto":
+        backend = "list" if args.mem_size <= LIST_MEMORY_LIMIT else "sparse"
+    mismatches = [f"{name} {given} (checkpoint: {saved})" for name, given, saved in (
+        ("memory size", args.mem_size, memory["size"]),
+        ("memory backend", backend, memory["kind"]),
+        ("cache size", args.cache_size, config["cache_size"]),
+        ("block size", args.block_size, config["block_size"]),
+        ("associativity", associativity, config["associativity"]),
+        ("replacement policy", args.replacement, config["replacement_policy"]),
+        ("write policy", args.write, config["write_policy"]),
+        ("storage", args.storage, config["storage"]),
+    ) if given != saved]
+    if mismatches:
+        parser.error(f"--resume {args.resume} was saved with a different configuration: "
+                     + ", ".join(mismatches))
+
+# =========================================================
+# Helper: Translate a mapping policy into an associativity
+# Raises ValueError for a malformed policy, or one whose N does not
+# divide the number of cache lines.
+# =========================================================
+def get_associativity(mapping, num_lines):
+    if mapping == "direct":
+        return 1
+    elif mapping == "full":
+        return num_lines
+    elif mapping.startswith("set:"):
+        try:
+            n = int(mapping.split(":")[1])
+        except ValueError:
+            raise ValueError(f"Invalid mapping policy {mapping!r}: format must be set:N (example: set:4).")
+        if n <= 0:
+            raise ValueError("Associativity N must be > 0.")
+        if num_lines % n != 0:
+            raise ValueError(f"Associativity N must divide total cache lines ({num_lines}).")
+        return n
+    else:
+        raise ValueError(f"Invalid mapping policy {mapping!r}. Must be direct, full, or set:N.")
 
 def print_stats(hits, misses):
     total = hits + misses
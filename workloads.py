@@ -0,0 +1,81 @@
+import bisect, random
+
+# =========================================================
+# Synthetic workloads
+# Seeded generators of ("read", addr) / ("write", addr, value) tuples,
+# the same format as TEST_SEQUENCE and read_trace, so they can be fed
+# to run_demo, run_trace, Cache.access_sequence or sweep.sweep.
+# Every generator takes the number of accesses, the memory size the
+# addresses must fit in, a write ratio (read/write mix) and a seed.
+# =========================================================
+
+def _access(rng, addr, write_ratio):
+    if write_ratio and rng.random() < write_ratio:
+        return ("write", addr, rng.randrange(256))
+    return ("read", addr)
+
+
+def sequential(n, mem_size, write_ratio=0.0, seed=0):
+    # 0, 1, 2, ... wrapping at the end of memory
+    rng = random.Random(seed)
+    for i in range(n):
+        yield _access(rng, i % mem_size, write_ratio)
+
+
+def strided(n, mem_size, stride=64, write_ratio=0.0, seed=0):
+    # 0, stride, 2*stride, ... wrapping at the end of memory
+    rng = random.Random(seed)
+    for i in range(n):
+        yield _access(rng, (i * stride) % mem_size, write_ratio)
+
+
+def random_uniform(n, mem_size, write_ratio=0.0, seed=0):
+    # Every address equally likely
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield _access(rng, rng.randrange(mem_size), write_ratio)
+
+
+def zipfian(n, mem_size, alpha=1.0, item_size=64, write_ratio=0.0, seed=0):
+    # Hot set: memory split into items of item_size bytes, item k (in a
+    # shuffled order) picked with probability ~ 1 / k^alpha, then a
+    # random byte inside it
+    rng = random.Random(seed)
+    num_items = max(1, mem_size // item_size)
+    cumulative = []
+    total = 0.0
+    for k in range(1, num_items + 1):
+        total += 1 / k ** alpha
+        cumulative.append(total)
+    items = list(range(num_items))
+    rng.shuffle(items)                      # Hot items are spread over memory
+
+    for _ in range(n):
+        rank = min(bisect.bisect_left(cumulative, rng.random() * total), num_items - 1)
+        addr = items[rank] * item_size + rng.randrange(item_size)
+        yield _access(rng, addr % mem_size, write_ratio)
+
+
+def looping(n, mem_size, working_set=8192, stride=1, write_ratio=0.0, seed=0):
+    # Sweeps the same working set over and over, `stride` bytes at a
+    # time; with a working set larger than the cache and a stride of
+    # one block, LRU and FIFO miss on every access
+    rng = random.Random(seed)
+    working_set = min(working_set, mem_size)
+    for i in range(n):
+        yield _access(rng, (i * stride) % working_set, write_ratio)
+
+
+WORKLOADS = {
+    "sequential": sequential,
+    "strided": strided,
+    "random": random_uniform,
+    "zipf": zipfian,
+    "loop": looping,
+}
+
+
+def make_workload(name, n, mem_size, write_ratio=0.0, seed=0, **params):
+    if name not in WORKLOADS:
+        raise ValueError(f"Unknown workload: {name}")
+    return WORKLOADS[name](n, mem_size, write_ratio=write_ratio, seed=seed, **params)
@@ -0,0 +1,147 @@
+from collections import OrderedDict
+
+# =========================================================
+# Coalescing write buffer
+# Sits between a Cache and its Memory and offers the same
+# read_block / write_block / read_byte / write_byte interface, so the
+# cache uses it as its memory. Stores (the per-byte write-through /
+# write-around traffic, and whole-block writebacks) are merged per
+# block in a bounded FIFO of entries:
+#   - a store to a block already buffered merges into its entry
+#   - a store to a new block when the buffer is full drains the
+#     oldest entry first
+#   - reads are forwarded buffered bytes on top of memory's data
+#   - flush() drains everything (call it before inspecting memory)
+# Draining an entry is ONE memory transaction (a masked block write):
+# a full entry is a plain write_block, a partial one is merged with
+# the block's current contents first.
+# =========================================================
+
+class WriteBuffer:
+    def __init__(self, capacity, block_size, memory=None):
+        if capacity < 1:
+            raise ValueError("Write buffer needs at least one entry.")
+        self.capacity = capacity            # Entries (blocks) held at once
+        self.block_size = block_size
+        self.memory = memory                # Memory behind the buffer (set before use)
+        self.full_mask = (1 << block_size) - 1
+
+        # Block number -> [data, mask], oldest first. Bit i of mask is set
+        # when byte i of data holds a buffered store.
+        self.entries = OrderedDict()
+
+        self.requests = 0                   # Stores received from the cache
+        self.transactions = 0               # Writes sent to memory
+        self.forwards = 0                   # Reads served (at least partly) from the buffer
+        self.capacity_drains = 0            # Entries drained to make room
+
+    @property
+    def size(self):
+        return self.memory.size
+
+    # ---------------- stores ----------------
+    def _entry(self, block_num):
+        entry = self.entries.get(block_num)
+        if entry is None:
+            if len(self.entries) == self.capacity:
+                self.capacity_drains += 1
+                self._drain(*self.entries.popitem(last=False))
+            entry = self.entries[block_num] = [[0] * self.block_size, 0]
+        return entry
+
+    def write_byte(self, address, value):
+        self.requests += 1
+        block_num, offset = divmod(address, self.block_size)
+        entry = self._entry(block_num)
+        entry[0][offset] = value
+        entry[1] |= 1 << offset
+
+    def write_block(self, block_num, block_data):
+        self.requests += 1
+        size = len(block_data)
+        if size == self.block_size:
+            entry = self._entry(block_num)
+            entry[0][:] = block_data
+            entry[1] = self.full_mask
+            return
+
+        # Sub-block or multi-block data: merge byte by byte
+        start = block_num * size
+        for i in range(size):
+            b, offset = divmod(start + i, self.block_size)
+            entry = self._entry(b)
+            entry[0][offset] = block_data[i]
+            entry[1] |= 1 << offset
+
+    # ---------------- loads (store-to-load forwarding) ----------------
+    def read_byte(self, address):
+        block_num, offset = divmod(address, self.block_size)
+        entry = self.entries.get(block_num)
+        if entry is not None and entry[1] >> offset & 1:
+            self.forwards += 1
+            return entry[0][offset]
+        return self.memory.read_byte(address)
+
+    def read_block(self, block_num, block_size):
+        data = self.memory.read_block(block_num, block_size)
+        if not self.entries:
+            return data
+
+        start = block_num * block_size
+        first = start // self.block_size
+        last = (start + block_size - 1) // self.block_size
+        forwarded = False
+        for b in range(first, last + 1):
+            entry = self.entries.get(b)
+            if entry is None:
+                continue
+            if not forwarded:
+                data = list(data)           # Memory may hand out a read-only view
+                forwarded = True
+            base = b * self.block_size - start
+            values, mask = entry
+            for offset in range(self.block_size):
+                if mask >> offset & 1 and 0 <= base + offset < block_size:
+                    data[base + offset] = values[offset]
+        if forwarded:
+            self.forwards += 1
+        return data
+
+    # ---------------- draining ----------------
+    def _drain(self, block_num, entry):
+        values, mask = entry
+        if mask != self.full_mask:
+            # Partial entry: merge into the block's current contents
+            merged = list(self.memory.read_block(block_num, self.block_size))
+            for offset in range(self.block_size):
+                if mask >> offset & 1:
+                    merged[offset] = values[offset]
+            values = merged
+        self.memory.write_block(block_num, values)
+        self.transactions += 1
+
+    def flush(self):
+        while self.entries:
+            self._drain(*self.entries.popitem(last=False))
+
+    # ---------------- statistics ----------------
+    def saved(self):
+        # Memory writes avoided compared with sending every store on its own
+        return self.requests - self.transactions
+
+    def stats(self):
+        return {
+            "entries": self.capacity,
+            "requests": self.requests,
+            "transactions": self.transactions,
+            "saved": self.saved(),
+            "forwards": self.forwards,
+            "capacity_drains": self.capacity_drains,
+        }
+
+    def print_report(self):
+        saved = self.saved()
+        percent = 100 * saved / self.requests if self.requests else 0
+        print(f"Write buffer ({self.capacity} entries): {self.requests} stores -> "
+              f"{self.transactions} memory writes, saved {saved} ({percent:.1f}%), "
+              f"{self.forwards} forwarded reads, {self.capacity_drains} capacity drains")